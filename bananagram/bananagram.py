@@ -1,71 +1,56 @@
 #!/usr/bin/env python3
-import sys
-import itertools
-from collections import Counter
+from collections import Counter, OrderedDict
 import multiprocessing
-import sqlite3
+import argparse
+import itertools
+import queue
+import time
+import cProfile
+import tracemalloc
+from lexicon import SqliteLexicon, CountingLexicon, load_lexicon
+from board import Board, SparseBoard
 
 # Database file path
 DB_FILE = 'words.db'
+# Binary lexicon file path (written by builddb.py)
+LEX_FILE = 'words.lex'
 
-# Global database connection (will be initialized when needed)
-db_conn = None
-
-def get_db_connection():
-    """Get a database connection, creating it if needed"""
-    global db_conn
-    if db_conn is None:
-        db_conn = sqlite3.connect(DB_FILE)
-    return db_conn
+# Global lexicon used for word and prefix checks (loaded when needed)
+lexicon = None
+# Answer word and prefix checks straight from SQLite instead of the lexicon
+USE_SQLITE = False
+# Failed positions remembered by the transposition table in each search
+TABLE_SIZE = 1 << 16
 
 def close_db_connection():
     """Close the database connection"""
-    global db_conn
-    if db_conn:
-        db_conn.close()
-        db_conn = None
+    global lexicon
+    inner = lexicon.lexicon if isinstance(lexicon, CountingLexicon) else lexicon
+    if isinstance(inner, SqliteLexicon):
+        inner.close()
+        lexicon = None
+
+def get_lexicon():
+    """Get the lexicon, mapping words.lex (or reading the database) if needed"""
+    global lexicon
+    if lexicon is None:
+        if USE_SQLITE:
+            lexicon = SqliteLexicon(DB_FILE)
+        else:
+            lexicon = load_lexicon(LEX_FILE, DB_FILE)
+    return lexicon
 
 # Check if a word is valid (exists in the dictionary)
 def is_valid_word(word):
-    conn = get_db_connection()
-    c = conn.cursor()
-    sorted_letters = ''.join(sorted(word.upper()))
-    c.execute('SELECT word FROM anagrams WHERE sorted_letters = ? AND word = ?', 
-             (sorted_letters, word.upper()))
-    result = c.fetchone()
-    return result is not None
+    return get_lexicon().is_word(word)
 
 # Check if a string is a valid prefix of any word in the dictionary
 def is_valid_prefix(prefix):
-    conn = get_db_connection()
-    c = conn.cursor()
-    # Check if there are any words that start with this prefix
-    c.execute('SELECT word FROM anagrams WHERE word LIKE ? LIMIT 1', (prefix.upper() + '%',))
-    result = c.fetchone()
-    return result is not None
+    return get_lexicon().is_prefix(prefix)
 
 # Generate all valid words that can be made from the given letters
 def get_all_words(letters):
-    conn = get_db_connection()
-    c = conn.cursor()
-    
-    # Generate all possible sorted letter combinations
-    letter_combos = set()
-    for length in range(1, len(letters) + 1):
-        for combo in itertools.combinations(letters, length):
-            sorted_combo = ''.join(sorted(combo))
-            letter_combos.add(sorted_combo)
-    
-    # Query database for all valid words
-    if not letter_combos:
-        return set()
-    
-    placeholders = ','.join('?' for _ in letter_combos)
-    query = f'SELECT word FROM anagrams WHERE sorted_letters IN ({placeholders})'
-    c.execute(query, list(letter_combos))
-    
-    words = {row[0] for row in c.fetchall()}
-    return words
+    return set(get_lexicon().words_from_rack(''.join(letters)))
 
 # Check if a word can be placed at a given position in the grid
 def can_place_word(grid, word, row, col, direction):
@@ -126,47 +111,6 @@ def is_word_connected(grid, word, row, col, direction):
     
     return False
 
-# Check if the grid has any isolated words (not connected to the main grid)
-def is_grid_connected(grid):
-    """Check if all words in the grid are connected to form a single crossword"""
-    size = len(grid)
-    if size == 0:
-        return True
-    
-    # Find the first letter in the grid
-    start_pos = None
-    for r in range(size):
-        for c in range(size):
-            if grid[r][c] != '.':
-                start_pos = (r, c)
-                break
-        if start_pos:
-            break
-    
-    if not start_pos:
-        return True  # Empty grid is considered connected
-    
-    # Use flood fill to mark all connected letters
-    visited = set()
-    stack = [start_pos]
-    
-    while stack:
-        r, c = stack.pop()
-        if (r, c) in visited or grid[r][c] == '.':
-            continue
-        
-        visited.add((r, c))
-        
-        # Add adjacent letters to the stack
-        for dr, dc in [(-1, 0), (1, 0), (0, -1), (0, 1)]:
-            nr, nc = r + dr, c + dc
-            if 0 <= nr < size and 0 <= nc < size and grid[nr][nc] != '.':
-                stack.append((nr, nc))
-    
-    # Check if all letters are visited (connected)
-    total_letters = sum(1 for r in range(size) for c in range(size) if grid[r][c] != '.')
-    return len(visited) == total_letters
-
 # Place a word on the grid and return a new grid (does not modify the original)
 def place_word(grid, word, row, col, direction):
     new_grid = [list(r) for r in grid]  # Deep copy of the grid
@@ -182,191 +126,860 @@ def place_word(grid, word, row, col, direction):
 def used_letters(grid):
     return [c for row in grid for c in row if c != '.']
 
-# Early pruning: check all 2+ letter sequences in rows and columns are valid words or prefixes
-def is_grid_partial_valid(grid):
+# Return (start, letters) of the run of letters through (row, col)
+def run_at(grid, row, col, direction):
     size = len(grid)
-    # Check all horizontal (across) sequences
-    for r in range(size):
-        c = 0
-        while c < size:
-            if grid[r][c] != '.':
-                start = c
-                while c < size and grid[r][c] != '.':
-                    c += 1
-                word = ''.join(grid[r][start:c])
-                if len(word) > 1 and not (is_valid_word(word) or is_valid_prefix(word)):
-                    return False
-            else:
-                c += 1
-    # Check all vertical (down) sequences
-    for c in range(size):
-        r = 0
-        while r < size:
-            if grid[r][c] != '.':
-                start = r
-                while r < size and grid[r][c] != '.':
-                    r += 1
-                word = ''.join(grid[i][c] for i in range(start, r))
-                if len(word) > 1 and not (is_valid_word(word) or is_valid_prefix(word)):
-                    return False
-            else:
-                r += 1
-    return True
+    if direction == 'across':
+        start = end = col
+        while start > 0 and grid[row][start - 1] != '.':
+            start -= 1
+        while end < size - 1 and grid[row][end + 1] != '.':
+            end += 1
+        return start, ''.join(grid[row][start:end + 1])
+    else:
+        start = end = row
+        while start > 0 and grid[start - 1][col] != '.':
+            start -= 1
+        while end < size - 1 and grid[end + 1][col] != '.':
+            end += 1
+        return start, ''.join(grid[r][col] for r in range(start, end + 1))
+
+# Cells a placement would fill that are empty now
+def new_cells(grid, word, row, col, direction):
+    if direction == 'across':
+        cells = [(row, col + i) for i in range(len(word))]
+    else:
+        cells = [(row + i, col) for i in range(len(word))]
+    return [(r, c) for r, c in cells if grid[r][c] == '.']
 
-# Check that all words in the grid (across and down) are valid
-def is_grid_valid(grid):
+# Runs of 2+ letters that are valid prefixes but not yet words, keyed by
+# (direction, line, start). Returns None if some run is not even a prefix.
+def grid_bad_runs(grid):
     size = len(grid)
-    # Check all horizontal (across) words
+    bad_runs = set()
     for r in range(size):
-        c = 0
-        while c < size:
-            if grid[r][c] != '.':
-                start = c
-                while c < size and grid[r][c] != '.':
-                    c += 1
-                word = ''.join(grid[r][start:c])
-                # Only check words longer than 1 letter
-                if len(word) > 1 and not is_valid_word(word):
-                    return False
-            else:
-                c += 1
-    # Check all vertical (down) words
-    for c in range(size):
-        r = 0
-        while r < size:
-            if grid[r][c] != '.':
-                start = r
-                while r < size and grid[r][c] != '.':
-                    r += 1
-                word = ''.join(grid[i][c] for i in range(start, r))
-                if len(word) > 1 and not is_valid_word(word):
-                    return False
-            else:
-                r += 1
-    return True
-
-# Recursive backtracking solver to fill the grid with all letters
-def solve(letters, size, grid=None):
-    if grid is None:
-        # Start with an empty grid filled with '.'
-        grid = [['.' for _ in range(size)] for _ in range(size)]
-    used = used_letters(grid)
-    remaining = list(letters)
-    # Remove already used letters from the list of available letters
-    for c in used:
-        if c in remaining:
-            remaining.remove(c)
-    # If all letters are used, check if the grid is valid and connected
-    if not remaining:
-        if is_grid_valid(grid) and is_grid_connected(grid):
-            return grid
-        return None
-    
-    # Check if this is the first word (no letters used yet)
-    is_first_word = len(used) == 0
-    
-    # Try to place a word using the remaining letters
-    words = get_all_words(remaining)
-    # Try longer words first for efficiency
-    words = sorted(words, key=lambda w: -len(w))
-    for word in words:
+        for c in range(size):
+            if grid[r][c] == '.':
+                continue
+            for direction, line, pos in (('across', r, c), ('down', c, r)):
+                start, word = run_at(grid, r, c, direction)
+                if start != pos or len(word) < 2:
+                    continue
+                if not is_valid_prefix(word):
+                    return None
+                if not is_valid_word(word):
+                    bad_runs.add((direction, line, start))
+    return bad_runs
+
+# After a word has been placed, re-check only the run along it and the
+# crossing runs through its new cells.
+# Every other run is unchanged, so the grid stays valid if these are.
+def update_bad_runs(grid, bad_runs, word, row, col, direction, placed):
+    bad_runs = set(bad_runs)
+    cross = 'down' if direction == 'across' else 'across'
+    checks = [(direction, row, col)] + [(cross, r, c) for r, c in placed]
+    for run_dir, r, c in checks:
+        start, run = run_at(grid, r, c, run_dir)
+        line = r if run_dir == 'across' else c
+        # Shorter runs merged into this one are no longer runs of their own
+        for key in [k for k in bad_runs if k[0] == run_dir and k[1] == line
+                    and start <= k[2] < start + len(run)]:
+            bad_runs.discard(key)
+        if len(run) < 2:
+            continue
+        if not is_valid_prefix(run):
+            return None
+        if not is_valid_word(run):
+            bad_runs.add((run_dir, line, start))
+    return bad_runs
+
+# Every placement the original search loop accepts: each word from the
+# rack at every cell and direction, kept if it fits, touches the board
+# (unless the board is empty), adds a tile and leaves every run a prefix.
+# Used to check generate_moves.
+def brute_force_moves(grid, letters):
+    size = len(grid)
+    is_first_word = not used_letters(grid)
+    bad_runs = grid_bad_runs(grid)
+    if bad_runs is None:
+        return []  # Every placement would fail the prefix check
+    moves = []
+    for word in get_all_words(letters):
         for r in range(size):
             for c in range(size):
                 for direction in ['across', 'down']:
-                    if can_place_word(grid, word, r, c, direction):
-                        # For Bananagrams: first word can be placed anywhere,
-                        # subsequent words must connect to existing words
-                        if not is_first_word and not is_word_connected(grid, word, r, c, direction):
-                            continue
-                        
-                        new_grid = place_word(grid, word, r, c, direction)
-                        # Early pruning: check if the grid is still potentially valid
-                        if not is_grid_partial_valid(new_grid):
-                            continue  # Prune this branch
-                        result = solve(letters, size, new_grid)
-                        if result:
-                            return result
-    return None  # No valid arrangement found
+                    if not can_place_word(grid, word, r, c, direction):
+                        continue
+                    if not is_first_word and not is_word_connected(grid, word, r, c, direction):
+                        continue
+                    placed = new_cells(grid, word, r, c, direction)
+                    if not placed:
+                        continue
+                    new_grid = place_word(grid, word, r, c, direction)
+                    if update_bad_runs(new_grid, bad_runs, word, r, c, direction, placed) is None:
+                        continue
+                    moves.append((word, r, c, direction))
+    return moves
+
+# Anchors and cross-checks along one stretch of a line (line i from cell
+# first on): is_anchor[j] says cell j is a tile or next to one, checks[j] is
+# the set of rack letters the crossing run allows in empty cell j (None when
+# there is no crossing run, so any letter will do)
+def stretch_checks(board, i, first, line, direction, rack_letters):
+    length = len(line)
+    is_anchor = [board.tiles == 0] * length
+    checks = [None] * length
+    dr, dc = (1, 0) if direction == 'across' else (0, 1)  # Step along the crossing runs
+    for j, cell in enumerate(line):
+        if cell != '.' or (j > 0 and line[j - 1] != '.') or (j < length - 1 and line[j + 1] != '.'):
+            is_anchor[j] = True
+        if cell != '.':
+            continue
+        r, c = (i, first + j) if direction == 'across' else (first + j, i)
+        before = after = ''
+        nr, nc = r - dr, c - dc
+        while board.tile(nr, nc) != '.':
+            before = board.tile(nr, nc) + before
+            nr, nc = nr - dr, nc - dc
+        nr, nc = r + dr, c + dc
+        while board.tile(nr, nc) != '.':
+            after += board.tile(nr, nc)
+            nr, nc = nr + dr, nc + dc
+        if before or after:
+            is_anchor[j] = True
+            checks[j] = {l for l in rack_letters if is_valid_prefix(before + l + after)}
+    return is_anchor, checks
+
+# Anchor-based move generator (after Appel & Jacobson): yields the same
+# (word, row, col, direction) placements as brute_force_moves would for the
+# board's grid and rack. Anchors are
+# the cells a connected word must cover (tiles and the empty cells beside
+# them; every cell on an empty board). From each start cell the lexicon is
+# walked letter by letter with the rack, existing tiles forcing their letter
+# and empty cells limited by their cross-check set, so only placements that
+# fit, connect and keep every run a prefix are produced.
+# Only the stretches of line the board offers are walked (board.lines()):
+# every line of a fixed board, but on a SparseBoard just the lines through
+# and beside the tiles, as far out as the rack could reach.
+# As in the original search, the whole word (tiles it crosses included) must
+# be spelled from the rack, unless board.free_crossings is set.
+def generate_moves(board):
+    lex = get_lexicon()
+    free_crossings = board.free_crossings
+    counts = Counter(board.remaining())
+    rack_letters = sorted(counts)
+
+    for direction in ('across', 'down'):
+        for i, first, size in board.lines(direction):
+            line = board.segment(i, first, size, direction)
+            is_anchor, checks_i = stretch_checks(board, i, first, line, direction, rack_letters)
+            # next_anchor[j]: first anchor at or after cell j of this stretch
+            next_anchor = [size] * (size + 1)
+            for j in range(size - 1, -1, -1):
+                next_anchor[j] = j if is_anchor[j] else next_anchor[j + 1]
+            if next_anchor[0] == size:
+                continue
+
+            def extend(node, pos, word, placed):
+                if placed and pos > anchor and lex.is_final(node):
+                    end = pos
+                    while end < size and line[end] != '.':
+                        end += 1
+                    run = left + word + ''.join(line[pos:end])
+                    if len(run) < 2 or lex.is_prefix(run):
+                        if direction == 'across':
+                            yield (word, i, first + start, direction)
+                        else:
+                            yield (word, first + start, i, direction)
+                if pos == size:
+                    return
+                cell = line[pos]
+                if cell != '.':
+                    options = [cell] if free_crossings or counts[cell] else []
+                else:
+                    allowed = checks_i[pos]
+                    options = [l for l in rack_letters if counts[l] and (allowed is None or l in allowed)]
+                for letter in options:
+                    child = lex.step(node, letter)
+                    if child is not None:
+                        spend = cell == '.' or not free_crossings
+                        counts[letter] -= spend
+                        yield from extend(child, pos + 1, word + letter, placed + (cell == '.'))
+                        counts[letter] += spend
+
+            for start in range(size):
+                anchor = next_anchor[start]
+                if anchor == size:
+                    break
+                left_start = start
+                while left_start > 0 and line[left_start - 1] != '.':
+                    left_start -= 1
+                left = ''.join(line[left_start:start])
+                yield from extend(lex.root, start, '', 0)
+
+# Compare generate_moves with brute_force_moves at every node of a search
+# for these letters (up to max_nodes nodes); returns the number of nodes checked
+def check_move_generator(letters, size, max_nodes=200):
+    checked = 0
+    stack = [[['.' for _ in range(size)] for _ in range(size)]]
+    while stack and checked < max_nodes:
+        grid = stack.pop()
+        board = Board.from_grid(grid, letters, get_lexicon())
+        expected = sorted(brute_force_moves(grid, board.remaining()))
+        generated = sorted(generate_moves(board))
+        if generated != expected:
+            print_grid(grid)
+            raise AssertionError(f"Move generator mismatch: missing {sorted(set(expected) - set(generated))}, "
+                                 f"extra {sorted(set(generated) - set(expected))}")
+        checked += 1
+        for word, r, c, direction in expected[:3]:
+            stack.append(place_word(grid, word, r, c, direction))
+    return checked
+
+# Counters for a search, so the cost of each node can be measured
+class SolverStats:
+    # Timing spans: finding the words a rack spells, generating moves (cross
+    # checks and lexicon walks), placing and taking back words (including
+    # re-checking the runs they touch), and checking finished boards
+    SPANS = ('words', 'generate', 'place', 'validate')
+
+    def __init__(self, trace_memory=False):
+        self.nodes = 0          # Positions searched
+        self.placements = 0     # Moves generated over all nodes
+        self.rejected = 0       # Moves undone because a run stopped being a prefix
+        self.max_depth = 0      # Deepest undo log reached
+        self.elapsed = 0.0      # Seconds spent searching
+        self.peak_memory = 0    # Peak bytes allocated while searching (if traced)
+        self.table_hits = 0     # Positions skipped by the transposition table
+        self.table_misses = 0   # Positions looked up and not found there
+        self.trace_memory = trace_memory
+        self.depth_nodes = []   # Positions searched at each depth (words placed)
+        self.spans = dict.fromkeys(self.SPANS, 0.0)  # Seconds spent in each span
+        self.lexicon_queries = {}  # Queries by method, if the lexicon counts them
+
+    def count_node(self, depth):
+        while len(self.depth_nodes) <= depth:
+            self.depth_nodes.append(0)
+        self.depth_nodes[depth] += 1
+        if depth > self.max_depth:
+            self.max_depth = depth
+
+    # Add the queries made through a CountingLexicon since its counts were before
+    def count_queries(self, lexicon, before):
+        for name, count in query_counts(lexicon).items():
+            self.lexicon_queries[name] = self.lexicon_queries.get(name, 0) + count - before.get(name, 0)
+
+    def as_dict(self):
+        """The counters as plain data, to pass between processes or save as JSON"""
+        return {name: value for name, value in vars(self).items() if name != 'trace_memory'}
+
+    def merge(self, other):
+        """Add the counters of another search (a SolverStats or its as_dict())"""
+        if isinstance(other, SolverStats):
+            other = other.as_dict()
+        for name in ('nodes', 'placements', 'rejected', 'elapsed', 'table_hits', 'table_misses'):
+            setattr(self, name, getattr(self, name) + other[name])
+        self.max_depth = max(self.max_depth, other['max_depth'])
+        self.peak_memory = max(self.peak_memory, other['peak_memory'])
+        depth_nodes = other['depth_nodes']
+        self.depth_nodes += [0] * (len(depth_nodes) - len(self.depth_nodes))
+        for depth, count in enumerate(depth_nodes):
+            self.depth_nodes[depth] += count
+        for name, seconds in other['spans'].items():
+            self.spans[name] += seconds
+        for name, count in other['lexicon_queries'].items():
+            self.lexicon_queries[name] = self.lexicon_queries.get(name, 0) + count
+
+    def report(self):
+        """Multi-line summary for --stats: totals, spans, nodes per depth and lexicon queries"""
+        lines = [str(self)]
+        if self.elapsed:
+            lines.append('time: ' + ', '.join(f"{name} {seconds:.3f} s ({seconds / self.elapsed:.0%})"
+                                              for name, seconds in self.spans.items()))
+        lines.append('nodes by depth: ' + ' '.join(f"{depth}:{count:,}"
+                                                   for depth, count in enumerate(self.depth_nodes)))
+        if self.lexicon_queries:
+            lines.append(f"lexicon queries: {sum(self.lexicon_queries.values()):,} (" +
+                         ', '.join(f"{name} {count:,}" for name, count in self.lexicon_queries.items()
+                                   if count) + ')')
+        return '\n'.join(lines)
+
+    def time_per_node(self):
+        return self.elapsed / self.nodes if self.nodes else 0.0
+
+    def memory_per_node(self):
+        return self.peak_memory / self.nodes if self.nodes else 0.0
+
+    def __str__(self):
+        text = (f"{self.nodes:,} nodes, {self.placements:,} placements, {self.rejected:,} rejected, "
+                f"depth {self.max_depth}, {self.elapsed:.3f} s ({self.time_per_node() * 1e6:.1f} us/node)")
+        if self.table_hits or self.table_misses:
+            text += f", table {self.table_hits:,} hits / {self.table_misses:,} misses"
+        if self.trace_memory:
+            text += f", peak {self.peak_memory:,} bytes ({self.memory_per_node():.1f} bytes/node)"
+        return text
+
+# Queries made so far through the lexicon, by method (none unless it counts them)
+def query_counts(lexicon):
+    return dict(lexicon.counts) if isinstance(lexicon, CountingLexicon) else {}
+
+# Positions (board hashes) already searched without finding a solution.
+# The same tiles are often reached through different word orders; a hit
+# skips the repeated subtree. Bounded to capacity entries, evicting either
+# the least recently used entry ('lru') or, with 'depth', whichever of the
+# two positions sharing a slot has fewer letters left to place.
+class TranspositionTable:
+    def __init__(self, capacity=TABLE_SIZE, policy='lru'):
+        if policy not in ('lru', 'depth'):
+            raise ValueError(f"Unknown table policy: {policy}")
+        self.capacity = capacity
+        self.policy = policy
+        self.hits = 0
+        self.misses = 0
+        self.stores = 0
+        self.evictions = 0
+        if policy == 'lru':
+            self.entries = OrderedDict()
+        else:
+            self.keys = [None] * capacity
+            self.left = [0] * capacity
+
+    def __len__(self):
+        if self.policy == 'lru':
+            return len(self.entries)
+        return sum(key is not None for key in self.keys)
+
+    def has_failed(self, h):
+        """True if the position with hash h is known to have no solution"""
+        if self.policy == 'lru':
+            found = h in self.entries
+            if found:
+                self.entries.move_to_end(h)
+        else:
+            found = self.keys[h % self.capacity] == h
+        if found:
+            self.hits += 1
+        else:
+            self.misses += 1
+        return found
+
+    def record_failure(self, h, left):
+        """Remember that the position with hash h (left letters to place) has no solution"""
+        if self.capacity <= 0:
+            return
+        self.stores += 1
+        if self.policy == 'lru':
+            self.entries[h] = left
+            self.entries.move_to_end(h)
+            if len(self.entries) > self.capacity:
+                self.entries.popitem(last=False)
+                self.evictions += 1
+        else:
+            slot = h % self.capacity
+            if self.keys[slot] is None or left >= self.left[slot]:
+                if self.keys[slot] is not None and self.keys[slot] != h:
+                    self.evictions += 1
+                self.keys[slot] = h
+                self.left[slot] = left
+
+# Moves in the order the search tries them: longer words first for efficiency
+def ordered_moves(board):
+    return sorted(generate_moves(board), key=lambda m: (-len(m[0]), m))
+
+# Depth-first search on a mutable board, backtracking through its undo log.
+# Leaves the board solved and returns True, or returns False with the board
+# as it was. control (see SearchControl) lets a parallel worker stop early
+# and hand untried moves to idle workers; table (a TranspositionTable)
+# skips positions already shown to fail.
+def search(board, stats, control=None, table=None):
+    stats.nodes += 1
+    stats.count_node(len(board.log))
+    spans = stats.spans
+    if board.left == 0:
+        start_time = time.perf_counter()
+        solved = board.is_solved()
+        spans['validate'] += time.perf_counter() - start_time
+        return solved
+    if table is not None:
+        if table.has_failed(board.hash):
+            stats.table_hits += 1
+            return False
+        stats.table_misses += 1
+    # Try every legal, connected placement
+    start_time = time.perf_counter()
+    moves = ordered_moves(board)
+    spans['generate'] += time.perf_counter() - start_time
+    stats.placements += len(moves)
+    given_away = control.given_away if control is not None else 0
+    for i, (word, r, c, direction) in enumerate(moves):
+        if control is not None:
+            if control.cancelled():
+                return False
+            if control.share(board, moves[i:]):
+                return False
+        # apply re-checks the touched runs; the generator already rejected
+        # dead ends, so this only keeps the run state up to date
+        start_time = time.perf_counter()
+        placed = board.apply(word, r, c, direction)
+        spans['place'] += time.perf_counter() - start_time
+        if not placed:
+            stats.rejected += 1
+            continue
+        if search(board, stats, control, table):
+            return True
+        start_time = time.perf_counter()
+        board.undo()
+        spans['place'] += time.perf_counter() - start_time
+    # Only a subtree searched in full (none of it cancelled or given to
+    # another worker) is known to fail
+    if table is not None and (control is None or (not control.stopped and control.given_away == given_away)):
+        table.record_failure(board.hash, board.left)
+    return False
 
 # Print the grid to the console
 def print_grid(grid):
     for row in grid:
         print(' '.join(row))
 
-# Helper for multiprocessing: solve for a specific grid size
-def solve_for_size(args):
-    letters, size = args
-    grid = solve(letters, size)
-    return (size, grid)
+# Size of a grid, as "width x height"
+def grid_size(grid):
+    return f"{len(grid[0]) if grid else 0}x{len(grid)}"
+
+# By symmetry the first word on an empty SparseBoard can go across from
+# (0, 0); the board grows from there in whatever direction the search takes
+# it. These are the openings in search order.
+def opening_moves(board):
+    words = get_all_words(board.remaining())
+    return sorted(((word, 0, 0, 'across') for word in words), key=lambda m: (-len(m[0]), m))
+
+# Expand the search breadth-first from the opening word until there are at
+# least count prefixes (lists of moves) to hand out, or max_depth is reached.
+# Returns (prefixes, solution) where solution is a grid if one turned up.
+def split_work(board, count, max_depth=3, stats=None):
+    frontier = [[]]
+    start_time = time.perf_counter()
+    openings = opening_moves(board)
+    if stats is not None:
+        stats.spans['words'] += time.perf_counter() - start_time
+    for depth in range(max_depth):
+        if depth > 0 and len(frontier) >= count:
+            break
+        next_frontier = []
+        for prefix in frontier:
+            for move in prefix:
+                board.apply(*move)
+            moves = openings if depth == 0 else ordered_moves(board)
+            if stats is not None:
+                stats.placements += len(moves)
+            for move in moves:
+                if board.apply(*move):
+                    if board.is_solved():
+                        return [], board.grid()
+                    # Prefixes that use every letter without solving are dead ends
+                    if board.left:
+                        next_frontier.append(prefix + [move])
+                    board.undo()
+            for _ in prefix:
+                board.undo()
+        frontier = next_frontier
+    return frontier, None
+
+# Lets a search running in a worker process notice that another worker has
+# finished, and give untried moves near the top of its tree to idle workers
+class SearchControl:
+    CHECK_EVERY = 64  # Moves between looks at the shared stop event
+
+    def __init__(self, stop, tasks, pending, idle, share_depth):
+        self.stop = stop
+        self.tasks = tasks
+        self.pending = pending
+        self.idle = idle
+        self.share_depth = share_depth
+        self.count = 0
+        self.stopped = False
+        self.given_away = 0  # Moves pushed to the queue so far
+
+    def cancelled(self):
+        self.count += 1
+        if not self.stopped and self.count % self.CHECK_EVERY == 0:
+            self.stopped = self.stop.is_set()
+        return self.stopped
+
+    # Push the given moves as new tasks if some worker is waiting for work
+    def share(self, board, moves):
+        if len(board.log) > self.share_depth or len(moves) < 2 or self.idle.value == 0:
+            return False
+        prefix = board.moves()
+        self.given_away += len(moves)
+        with self.pending.get_lock():
+            self.pending.value += len(moves)
+        for move in moves:
+            self.tasks.put(prefix + [move])
+        return True
+
+# Worker process: take prefixes from the shared queue and search below them
+# until the queue runs dry or some worker finds a solution
+def parallel_worker(letters, tasks, results, stop, pending, idle, share_depth, table_size, table_policy):
+    global lexicon
+    # Donated tasks may still be queued when the search stops; don't wait on them
+    tasks.cancel_join_thread()
+    # An SQLite connection must not be shared across a fork
+    if isinstance(lexicon, SqliteLexicon):
+        lexicon = SqliteLexicon(DB_FILE)
+    elif isinstance(lexicon, CountingLexicon) and isinstance(lexicon.lexicon, SqliteLexicon):
+        lexicon = CountingLexicon(SqliteLexicon(DB_FILE))
+    board = SparseBoard(letters, get_lexicon())
+    stats = SolverStats()
+    control = SearchControl(stop, tasks, pending, idle, share_depth)
+    table = TranspositionTable(table_size, table_policy) if table_size > 0 else None
+    queries = query_counts(board.lexicon)
+    start_time = time.perf_counter()
+    try:
+        while not stop.is_set():
+            with idle.get_lock():
+                idle.value += 1
+            try:
+                prefix = tasks.get(timeout=0.05)
+            except queue.Empty:
+                if pending.value == 0:
+                    break  # Every task has been searched
+                continue
+            finally:
+                with idle.get_lock():
+                    idle.value -= 1
+            if all(board.apply(*move) for move in prefix):
+                if search(board, stats, control, table):
+                    results.put(('solution', board.grid()))
+                    stop.set()
+            while board.log:
+                board.undo()
+            with pending.get_lock():
+                pending.value -= 1
+    finally:
+        stats.elapsed = time.perf_counter() - start_time
+        stats.count_queries(board.lexicon, queries)
+        results.put(('stats', stats.as_dict()))
+
+# Search for a layout of all the letters on one SparseBoard, using every core.
+# The tree is split into tasks at its first few placements; workers share a
+# queue, hand work to idle workers, and all stop as soon as one succeeds.
+# Returns the grid (the tiles' bounding box), or None if there is none (or
+# timeout runs out).
+def parallel_solve(letters, workers=None, timeout=None, stats=None, share_depth=3,
+                   table_size=TABLE_SIZE, table_policy='lru'):
+    letters = list(letters)
+    if not letters:
+        return None
+    workers = workers or multiprocessing.cpu_count()
+    if stats is None:
+        stats = SolverStats()
+    board = SparseBoard(letters, get_lexicon())
+    queries = query_counts(board.lexicon)
+    prefixes, solution = split_work(board, 4 * workers, stats=stats)
+    stats.count_queries(board.lexicon, queries)
+    if solution is not None or not prefixes:
+        return solution
+
+    tasks = multiprocessing.Queue()
+    results = multiprocessing.Queue()
+    stop = multiprocessing.Event()
+    pending = multiprocessing.Value('i', len(prefixes))
+    idle = multiprocessing.Value('i', 0)
+    for prefix in prefixes:
+        tasks.put(prefix)
+    procs = [multiprocessing.Process(target=parallel_worker,
+                                     args=(letters, tasks, results, stop, pending, idle, share_depth,
+                                           table_size, table_policy))
+             for _ in range(workers)]
+    for proc in procs:
+        proc.start()
+
+    solution = None
+    finished = 0
+    deadline = None if timeout is None else time.time() + timeout
+    try:
+        while finished < workers:
+            wait = 0.1 if deadline is None else min(0.1, deadline - time.time())
+            if wait <= 0:
+                stop.set()
+                deadline = None  # Keep collecting the workers' stats
+                continue
+            try:
+                kind, payload = results.get(timeout=wait)
+            except queue.Empty:
+                if not any(proc.is_alive() for proc in procs):
+                    break
+                continue
+            if kind == 'solution':
+                if solution is None:
+                    solution = payload
+                stop.set()
+            elif kind == 'stats':
+                finished += 1
+                stats.merge(payload)
+    finally:
+        stop.set()
+        for proc in procs:
+            proc.join(timeout=1)
+            if proc.is_alive():
+                proc.terminate()
+    return solution
+
+# Search for a layout of all the letters in this process, the way a single
+# parallel_solve worker would: every opening in turn on one SparseBoard.
+# Slower than parallel_solve on a multicore machine, but the whole search
+# runs here, where it can be profiled, and node counts repeat exactly.
+# Returns the grid (the tiles' bounding box), or None if there is none (or
+# timeout runs out).
+def serial_solve(letters, timeout=None, stats=None, table_size=TABLE_SIZE, table_policy='lru'):
+    letters = list(letters)
+    if not letters:
+        return None
+    if stats is None:
+        stats = SolverStats()
+    board = SparseBoard(letters, get_lexicon())
+    control = SearchDeadline(time.time() + timeout) if timeout is not None else None
+    table = TranspositionTable(table_size, table_policy) if table_size > 0 else None
+    queries = query_counts(board.lexicon)
+    if stats.trace_memory:
+        tracemalloc.start()
+    start_time = time.perf_counter()
+    try:
+        openings, solution = split_work(board, 1, max_depth=1, stats=stats)
+        if solution is not None:
+            return solution
+        for (opening,) in openings:
+            board.apply(*opening)
+            if search(board, stats, control, table):
+                return board.grid()
+            board.undo()
+            if control is not None and control.stopped:
+                break
+        return None
+    finally:
+        stats.elapsed += time.perf_counter() - start_time
+        stats.count_queries(board.lexicon, queries)
+        if stats.trace_memory:
+            stats.peak_memory = max(stats.peak_memory, tracemalloc.get_traced_memory()[1])
+            tracemalloc.stop()
+
+# Stops a search once a deadline passes; used in place of a SearchControl
+class SearchDeadline:
+    def __init__(self, deadline):
+        self.deadline = deadline
+        self.stopped = False
+        self.given_away = 0  # Never shares work, but search() reads this
+
+    # Looks at the clock before every move: a node on a big board can take
+    # longer than the whole budget, and the clock is cheap next to a move
+    def cancelled(self):
+        if not self.stopped:
+            self.stopped = time.time() >= self.deadline
+        return self.stopped
+
+    def share(self, board, moves):
+        return False
+
+# How hard each letter is to place: roughly its Scrabble score, so Q, Z, J
+# and X go down while there is still room for them
+LETTER_WEIGHTS = {
+    'Q': 10, 'Z': 10, 'J': 8, 'X': 8, 'K': 5,
+    'F': 4, 'H': 4, 'V': 4, 'W': 4, 'Y': 4,
+    'B': 3, 'C': 3, 'M': 3, 'P': 3, 'D': 2, 'G': 2,
+}
+# Worth of one open anchor against one point of letter weight left in the rack
+ANCHOR_WEIGHT = 0.5
+
+# Heuristic value of a position for the anytime solver: hard letters still
+# in the rack count against it, open anchors (room to attach) for it
+def position_score(board):
+    rack_weight = sum(n * LETTER_WEIGHTS.get(chr(65 + i), 1) for i, n in enumerate(board.rack))
+    return ANCHOR_WEIGHT * board.open_anchors - rack_weight
+
+# Anytime solver: beam search on a SparseBoard, placing one word per level
+# and keeping the beam_width best positions by position_score. If the beam
+# dies out without a solution the search starts again with twice the width,
+# until the time budget runs out. Returns (grid, unplaced letters): a full
+# solution has no unplaced letters, otherwise the grid is the best valid
+# partial board seen (most tiles placed, then best score).
+def anytime_solve(letters, timeout, beam_width=8, stats=None):
+    deadline = time.time() + timeout
+    letters = list(letters)
+    if stats is None:
+        stats = SolverStats()
+    board = SparseBoard(letters, get_lexicon())
+    best = (-1, 0.0, [])  # (tiles placed, score, moves) of the best valid board
+    width = beam_width
+    spans = stats.spans
+    queries = query_counts(board.lexicon)
+    start_time = time.perf_counter()
+    try:
+        while time.time() < deadline:
+            beam = [[]]
+            while beam and time.time() < deadline:
+                children = {}
+                for prefix in beam:
+                    for move in prefix:
+                        board.apply(*move)
+                    stats.nodes += 1
+                    stats.count_node(len(prefix))
+                    span_start = time.perf_counter()
+                    moves = list(generate_moves(board)) if prefix else opening_moves(board)
+                    spans['generate' if prefix else 'words'] += time.perf_counter() - span_start
+                    for move in moves:
+                        stats.placements += 1
+                        span_start = time.perf_counter()
+                        placed = board.apply(*move)
+                        spans['place'] += time.perf_counter() - span_start
+                        if not placed:
+                            stats.rejected += 1
+                            continue
+                        if board.is_solved():
+                            return board.grid(), []
+                        score = position_score(board)
+                        if not board.bad_runs and (board.tiles, score) > best[:2]:
+                            best = (board.tiles, score, prefix + [move])
+                        # Different word orders reaching the same tiles count once
+                        if board.hash not in children or children[board.hash][0] < score:
+                            children[board.hash] = (score, prefix + [move])
+                        board.undo()
+                        if time.time() >= deadline:
+                            break
+                    for _ in prefix:
+                        board.undo()
+                ranked = sorted(children.values(), key=lambda item: -item[0])
+                beam = [moves for _, moves in ranked[:width]]
+            width *= 2
+    finally:
+        stats.elapsed += time.perf_counter() - start_time
+        stats.count_queries(board.lexicon, queries)
+    # Out of time: rebuild the best partial board
+    for move in best[2]:
+        board.apply(*move)
+    return board.grid(), board.remaining()
+
+# Show a partial grid from anytime_solve and the letters left off it
+def print_partial(grid, unplaced):
+    print(f"Best partial grid ({grid_size(grid)} board, {len(unplaced)} letters unplaced: {''.join(unplaced)}):")
+    if grid:
+        print_grid(grid)
+
+# The words (runs of 2+ letters) on a grid, each as a list of its cells
+def grid_words(grid):
+    words = []
+    height, width = len(grid), len(grid[0]) if grid else 0
+    lines = [[(r, c) for c in range(width)] for r in range(height)]
+    lines += [[(r, c) for r in range(height)] for c in range(width)]
+    for cells in lines:
+        run = []
+        for cell in cells + [None]:
+            if cell is not None and grid[cell[0]][cell[1]] != '.':
+                run.append(cell)
+                continue
+            if len(run) > 1:
+                words.append(run)
+            run = []
+    return words
+
+# Take words off a grid: clear their cells except those another word crosses
+def remove_words(grid, words, all_words):
+    new_grid = [list(row) for row in grid]
+    removed = set(cell for word in words for cell in word)
+    kept = set(cell for word in all_words if word not in words for cell in word)
+    for r, c in removed - kept:
+        new_grid[r][c] = '.'
+    return new_grid
+
+# Peel: fit new letters into the last solved grid instead of starting over.
+# First the new letters are attached to the board as it stands; then each
+# word, and each pair of words, is taken off and its letters placed again
+# along with the new ones. Words may run through tiles already on the board.
+# Returns the new grid, or None if nothing worked within timeout seconds.
+def peel(grid, letters, new_letters, timeout=1.0, max_removed=2, table_size=TABLE_SIZE, stats=None):
+    deadline = time.time() + timeout
+    letters = list(letters) + list(new_letters)
+    if stats is None:
+        stats = SolverStats()
+    words = grid_words(grid)
+    repairs = [()]
+    for count in range(1, max_removed + 1):
+        repairs += itertools.combinations(words, count)
+    lexicon = get_lexicon()
+    queries = query_counts(lexicon)
+    start_time = time.perf_counter()
+    try:
+        for removed in repairs:
+            start = remove_words(grid, removed, words) if removed else grid
+            board = SparseBoard.from_grid(start, letters, lexicon)
+            if board is None:
+                continue
+            board.free_crossings = True
+            table = TranspositionTable(table_size) if table_size > 0 else None
+            control = SearchDeadline(deadline)
+            if search(board, stats, control, table):
+                return board.grid()
+            if control.stopped:
+                return None
+        return None
+    finally:
+        stats.elapsed += time.perf_counter() - start_time
+        stats.count_queries(lexicon, queries)
 
 # Interactive mode: prompt user to add one letter at a time and show the grid after each addition, using multicore solving
-def interactive_mode():
+def interactive_mode(table_size=TABLE_SIZE, table_policy='lru', peel_mode=False, peel_timeout=1.0,
+                     partial_budget=5.0, show_stats=False):
     print("Interactive Bananagrams mode. Enter letters (single or multiple). Type 'quit' to exit.")
     print("Solver will timeout after 60 seconds if no solution is found.")
+    if peel_mode:
+        print("Peel mode: new letters are fitted into the last grid before searching again.")
     letters = []
+    last_grid = None  # Last solved grid, kept for peel mode
     while True:
         print(f"Current letters: {''.join(letters)}")
         inp = input("Enter letter(s) (or 'quit' to finish): ").strip().upper()
         if inp == 'QUIT':
             print("Exiting interactive mode.")
             break
-        if not inp.isalpha():
+        if not (inp.isascii() and inp.isalpha()):
             print("Please enter alphabetic letters only.")
             continue
         
         # Add all letters from the input
         new_letters = list(inp)
+        old_letters = list(letters)
         letters.extend(new_letters)
         print(f"Added letters: {', '.join(new_letters)}")
         
-        n = len(letters)
-        import math
-        min_size = int(math.ceil(n ** 0.5))
-        # Try from maximum size down to minimum for better success rate
-        sizes = list(range(n, min_size - 1, -1))
-        found = False
         try:
-            import time
             start_time = time.time()
             timeout_seconds = 60  # 60 second timeout
-            
-            with multiprocessing.Pool() as pool:
-                # Submit all sizes for parallel processing
-                futures = {pool.apply_async(solve_for_size, [(letters, s)]): s for s in sizes}
-                
-                # Check for completion with timeout
-                for future in futures:
-                    try:
-                        # Wait for result with timeout
-                        remaining_time = max(0, timeout_seconds - (time.time() - start_time))
-                        if remaining_time <= 0:
-                            print(f"\nSolver timed out after {timeout_seconds} seconds.")
-                            print("Try adding a different letter or fewer letters.")
-                            break
-                        
-                        size, grid = future.get(timeout=remaining_time)
-                        if grid:
-                            elapsed = time.time() - start_time
-                            print(f"Solution found in {elapsed:.2f} seconds:")
-                            print("Possible grid:")
-                            print_grid(grid)
-                            found = True
-                            break
-                    except multiprocessing.TimeoutError:
-                        print(f"\nSolver timed out after {timeout_seconds} seconds.")
-                        print("Try adding a different letter or fewer letters.")
-                        break
-                    except Exception as e:
-                        print(f"Error during solving: {e}")
-                        continue
-            
-            if not found:
+            stats = SolverStats()
+            grid = None
+            if peel_mode and last_grid:
+                grid = peel(last_grid, old_letters, new_letters, timeout=peel_timeout, table_size=table_size,
+                            stats=stats)
+                if grid:
+                    print(f"Peeled into the last grid in {time.time() - start_time:.2f} seconds:")
+                    print_grid(grid)
+            if not grid:
+                grid = parallel_solve(letters, timeout=timeout_seconds - (time.time() - start_time), stats=stats,
+                                      table_size=table_size, table_policy=table_policy)
                 elapsed = time.time() - start_time
-                if elapsed >= timeout_seconds:
+                if grid:
+                    print(f"Solution found in {elapsed:.2f} seconds ({grid_size(grid)} board):")
+                    print("Possible grid:")
+                    print_grid(grid)
+                elif elapsed >= timeout_seconds:
                     print(f"No solution found within {timeout_seconds} seconds.")
+                    if partial_budget > 0:
+                        partial, unplaced = anytime_solve(letters, partial_budget, stats=stats)
+                        print_partial(partial, unplaced)
                     print("Try adding a different letter or fewer letters.")
                 else:
                     print("No valid Bananagram could be formed with the given letters.")
+            if show_stats:
+                print(stats.report())
+            last_grid = grid
                     
         except KeyboardInterrupt:
             # Allow user to interrupt a long solve and continue
@@ -375,36 +988,113 @@ def interactive_mode():
 
 # Main entry point: choose batch or interactive mode, both using multicore solving
 def main():
+    global USE_SQLITE, lexicon
+    parser = argparse.ArgumentParser(description='Arrange letters into a Bananagrams grid')
+    parser.add_argument('letters', nargs='?', help='letters to place (interactive mode if omitted)')
+    parser.add_argument('--sqlite', action='store_true',
+                        help='check words with SQLite queries instead of the in-memory lexicon')
+    parser.add_argument('--table-size', type=int, default=TABLE_SIZE, metavar='N',
+                        help=f'failed positions each worker remembers (0 to disable, default {TABLE_SIZE})')
+    parser.add_argument('--table-policy', choices=['lru', 'depth'], default='lru',
+                        help='transposition table eviction: least recently used, or keep deeper subtrees')
+    parser.add_argument('--peel', action='store_true',
+                        help='interactive mode: fit new letters into the last grid before a full search')
+    parser.add_argument('--peel-timeout', type=float, default=1.0, metavar='SECONDS',
+                        help='time allowed for peel attempts before falling back to a full search')
+    parser.add_argument('--time-budget', type=float, metavar='SECONDS',
+                        help='batch mode: stop after SECONDS and show the best partial grid found')
+    parser.add_argument('--partial-budget', type=float, default=5.0, metavar='SECONDS',
+                        help='interactive mode: time spent on a best partial grid after a timeout (0 to skip)')
+    parser.add_argument('--check-moves', type=int, metavar='SIZE',
+                        help='check the move generator against the brute-force loop on a SIZE grid')
+    parser.add_argument('--stats', action='store_true',
+                        help='show node counts per depth, time per part of the search and lexicon queries')
+    parser.add_argument('--trace-memory', action='store_true',
+                        help='batch mode: search in this process with tracemalloc on and report peak memory per node')
+    parser.add_argument('--profile', metavar='FILE',
+                        help='batch mode: search in this process under cProfile and save the profile to FILE')
+    parser.add_argument('--server', action='store_true', help='batch mode: have a running server.py solve the letters')
+    parser.add_argument('--address', default='bananagram.sock',
+                        help="the server's socket path or HOST:PORT (default bananagram.sock)")
+    args = parser.parse_args()
+    if args.letters:
+        # Every mode below counts tiles A-Z; anything else is a typo
+        args.letters = args.letters.upper()
+        if not (args.letters.isascii() and args.letters.isalpha()):
+            parser.error('LETTERS must be the letters A-Z only')
+    USE_SQLITE = args.sqlite
+    if args.server and args.letters:
+        # The server has the lexicon loaded and its solver processes running
+        from client import Client
+        start_time = time.time()
+        result = Client(args.address).call('solve', letters=args.letters)
+        elapsed = time.time() - start_time
+        if result['grid']:
+            print(f"Solution found in {elapsed:.2f} seconds ({grid_size(result['grid'])} board):")
+            print_grid(result['grid'])
+        elif result['timed_out']:
+            print(f"No solution found within the server's time limit ({elapsed:.2f} seconds).")
+        else:
+            print(f"No valid Bananagram could be formed with the given letters.")
+        return
+    if not USE_SQLITE:
+        # Load once here so every worker shares the same lexicon pages
+        get_lexicon()
+    if args.stats:
+        lexicon = CountingLexicon(get_lexicon())
+    stats = SolverStats(trace_memory=args.trace_memory)
     try:
-        if len(sys.argv) == 2:
+        if args.check_moves:
+            if not args.letters:
+                parser.error('--check-moves needs LETTERS')
+            nodes = check_move_generator(args.letters, args.check_moves)
+            print(f"Move generator matches the brute-force loop on {nodes} positions.")
+        elif args.letters and args.time_budget:
+            # Anytime mode: best grid within the time budget, complete or not
+            start_time = time.time()
+            grid, unplaced = anytime_solve(args.letters, args.time_budget, stats=stats)
+            elapsed = time.time() - start_time
+            if unplaced:
+                print_partial(grid, unplaced)
+            else:
+                print(f"Solution found in {elapsed:.2f} seconds ({grid_size(grid)} board):")
+                print_grid(grid)
+            if args.stats:
+                print(stats.report())
+        elif args.letters:
             # Batch mode: all letters at once, use multicore
-            letters = sys.argv[1].upper()
-            n = len(letters)
-            import math
-            min_size = int(math.ceil(n ** 0.5))
-            # Try from maximum size down to minimum for better success rate
-            sizes = list(range(n, min_size - 1, -1))
-            found = False
-            
-            import time
+            letters = args.letters
             start_time = time.time()
-            
-            with multiprocessing.Pool() as pool:
-                for size, grid in pool.imap_unordered(solve_for_size, [(letters, s) for s in sizes]):
-                    if grid:
-                        elapsed = time.time() - start_time
-                        print(f"Solution found in {elapsed:.2f} seconds:")
-                        print_grid(grid)
-                        found = True
-                        break
-            
-            if not found:
-                elapsed = time.time() - start_time
+            if args.profile:
+                # Worker processes would escape the profiler, so search here
+                profiler = cProfile.Profile()
+                grid = profiler.runcall(serial_solve, letters, stats=stats,
+                                        table_size=args.table_size, table_policy=args.table_policy)
+                profiler.dump_stats(args.profile)
+            elif args.trace_memory:
+                # Only allocations in this process are traced
+                grid = serial_solve(letters, stats=stats, table_size=args.table_size,
+                                    table_policy=args.table_policy)
+            else:
+                grid = parallel_solve(letters, stats=stats, table_size=args.table_size,
+                                      table_policy=args.table_policy)
+            elapsed = time.time() - start_time
+            if grid:
+                print(f"Solution found in {elapsed:.2f} seconds ({grid_size(grid)} board):")
+                print_grid(grid)
+            else:
                 print(f"No valid Bananagram could be formed with the given letters.")
                 print(f"Search completed in {elapsed:.2f} seconds.")
+            if args.stats:
+                print(stats.report())
+            elif args.trace_memory:
+                print(stats)
+            if args.profile:
+                print(f"Profile written to {args.profile} (read it with: python3 -m pstats {args.profile})")
         else:
             # Interactive mode
-            interactive_mode()
+            interactive_mode(args.table_size, args.table_policy, args.peel, args.peel_timeout,
+                             args.partial_budget, args.stats)
     finally:
         # Always close the database connection
         close_db_connection()
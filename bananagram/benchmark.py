@@ -0,0 +1,136 @@
+#!/usr/bin/env python3
+# Benchmark the bananagram search on a fixed corpus of racks.
+# Each rack is solved with serial_solve, in one process on the SparseBoard
+# parallel_solve uses, so node counts are the same from run to run. A second
+# pass, with the lexicon wrapped to count queries and tracemalloc on,
+# measures lexicon queries and peak memory without slowing down the timed pass.
+# Results are written as JSON; --compare prints two result files side by side.
+import sys
+import json
+import time
+import argparse
+import platform
+import bananagram
+from bananagram import SolverStats, TABLE_SIZE, serial_solve
+from lexicon import Lexicon, CountingLexicon
+
+# Small word list shipped with the benchmark, so it runs without the Collins file
+WORDS_FILE = 'bench_words.txt'
+# Racks to solve, one per line; '#' starts a comment
+RACKS_FILE = 'bench_racks.txt'
+# Seconds allowed for each rack before it counts as timed out
+TIMEOUT = 10.0
+
+# Read the rack corpus: (rack, comment) pairs
+def read_racks(path):
+    racks = []
+    with open(path) as f:
+        for line in f:
+            rack, _, comment = line.partition('#')
+            rack = rack.strip().upper()
+            if rack:
+                racks.append((rack, comment.strip()))
+    return racks
+
+# Benchmark one rack: a timed pass, then (unless quick) a counting pass
+def bench_rack(lexicon, rack, timeout=TIMEOUT, table_size=TABLE_SIZE, quick=False):
+    bananagram.lexicon = lexicon
+    stats = SolverStats()
+    start_time = time.perf_counter()
+    grid = serial_solve(rack, timeout, stats, table_size)
+    wall_time = time.perf_counter() - start_time
+    result = {
+        'rack': rack,
+        'tiles': len(rack),
+        'solved': grid is not None,
+        'timed_out': grid is None and wall_time >= timeout,
+        'board': [len(grid[0]), len(grid)] if grid else None,  # Width and height of the solution
+        'wall_time': round(wall_time, 4),
+        'nodes': stats.nodes,
+        'placements': stats.placements,
+        'rejected': stats.rejected,
+        # Share of generated placements never searched below (rejected,
+        # skipped by the transposition table, or left after a solution)
+        'prune_rate': round(1 - stats.nodes / stats.placements, 4) if stats.placements else 0.0,
+        'table_hits': stats.table_hits,
+        'max_depth': stats.max_depth,
+        'us_per_node': round(stats.time_per_node() * 1e6, 1),
+        'depth_nodes': stats.depth_nodes,
+        'spans': {name: round(seconds, 4) for name, seconds in stats.spans.items()},
+    }
+    if not quick:
+        counting = CountingLexicon(lexicon)
+        bananagram.lexicon = counting
+        try:
+            counted = SolverStats(trace_memory=True)
+            serial_solve(rack, timeout, counted, table_size)
+        finally:
+            bananagram.lexicon = lexicon
+        result['peak_memory'] = counted.peak_memory
+        result['lexicon_queries'] = sum(counted.lexicon_queries.values())
+        result['queries_by_kind'] = counted.lexicon_queries
+    return result
+
+# Print two result files rack by rack, with the change in time and nodes
+def compare(old_file, new_file):
+    with open(old_file) as f:
+        old = {r['rack']: r for r in json.load(f)['racks']}
+    with open(new_file) as f:
+        new = json.load(f)['racks']
+    print(f"{'rack':<32} {'old s':>8} {'new s':>8} {'speedup':>8} {'old nodes':>10} {'new nodes':>10}")
+    for r in new:
+        o = old.get(r['rack'])
+        if o is None:
+            continue
+        speedup = o['wall_time'] / r['wall_time'] if r['wall_time'] else float('inf')
+        print(f"{r['rack']:<32} {o['wall_time']:>8.3f} {r['wall_time']:>8.3f} {speedup:>7.2f}x "
+              f"{o['nodes']:>10,} {r['nodes']:>10,}")
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark the bananagram solver on a fixed set of racks')
+    parser.add_argument('-o', '--output', metavar='FILE', help='write the results as JSON to FILE')
+    parser.add_argument('--words', default=WORDS_FILE, help=f'word list to solve with (default {WORDS_FILE})')
+    parser.add_argument('--racks', default=RACKS_FILE, help=f'racks to solve (default {RACKS_FILE})')
+    parser.add_argument('--timeout', type=float, default=TIMEOUT, metavar='SECONDS',
+                        help=f'time allowed per rack (default {TIMEOUT})')
+    parser.add_argument('--table-size', type=int, default=TABLE_SIZE, metavar='N',
+                        help='transposition table size (0 to disable)')
+    parser.add_argument('--max-tiles', type=int, metavar='N', help='skip racks with more than N tiles')
+    parser.add_argument('--quick', action='store_true',
+                        help='skip the pass counting lexicon queries and peak memory')
+    parser.add_argument('--compare', nargs=2, metavar=('OLD', 'NEW'), help='compare two result files')
+    args = parser.parse_args()
+
+    if args.compare:
+        compare(*args.compare)
+        return
+    lexicon = Lexicon.from_file(args.words)
+    results = []
+    for rack, comment in read_racks(args.racks):
+        if args.max_tiles and len(rack) > args.max_tiles:
+            continue
+        result = bench_rack(lexicon, rack, args.timeout, args.table_size, args.quick)
+        result['comment'] = comment
+        results.append(result)
+        status = 'solved' if result['solved'] else 'timeout' if result['timed_out'] else 'no layout'
+        print(f"{rack:<32} {status:<9} {result['wall_time']:>8.3f} s {result['nodes']:>10,} nodes "
+              f"{result['prune_rate']:>6.1%} pruned", file=sys.stderr)
+    report = {
+        'words': args.words,
+        'lexicon_words': len(lexicon),
+        'timeout': args.timeout,
+        'table_size': args.table_size,
+        'python': platform.python_version(),
+        'date': time.strftime('%Y-%m-%d %H:%M:%S'),
+        'racks': results,
+    }
+    if args.output:
+        with open(args.output, 'w') as f:
+            json.dump(report, f, indent=1)
+            f.write('\n')
+    else:
+        json.dump(report, sys.stdout, indent=1)
+        print()
+
+if __name__ == "__main__":
+    main()
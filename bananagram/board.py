@@ -0,0 +1,517 @@
+#!/usr/bin/env python3
+# Mutable Bananagrams board for the backtracking solver.
+# The grid is one flat bytearray and the rack a count per letter; placing a
+# word records what it changed in an undo log so the search can backtrack
+# without copying the grid.
+# The board also keeps a Zobrist hash of its tiles and rack, updated as
+# words are applied and undone, for the solver's transposition table.
+# SparseBoard has the same interface without a fixed size: its tiles are
+# keyed by (row, col) and it grows in any direction, so the solvers no
+# longer need a grid big enough for every layout.
+import random
+
+EMPTY = ord('.')
+ACROSS = 'across'
+DOWN = 'down'
+
+# Zobrist keys: one random 64-bit number per (cell, letter) and per
+# (letter, count in rack); a position's hash is the XOR of its keys
+_zobrist_cache = {}
+
+def zobrist_keys(size, max_count):
+    """(cell keys indexed [cell * 26 + letter], rack keys indexed [letter][count])"""
+    if (size, max_count) not in _zobrist_cache:
+        rng = random.Random(size * 1000 + max_count)  # Same keys in every process
+        cell_keys = [rng.getrandbits(64) for _ in range(size * size * 26)]
+        rack_keys = [[rng.getrandbits(64) for _ in range(max_count + 1)] for _ in range(26)]
+        _zobrist_cache[(size, max_count)] = (cell_keys, rack_keys)
+    return _zobrist_cache[(size, max_count)]
+
+_sparse_keys = {}
+
+def cell_keys_at(row, col):
+    """The 26 Zobrist keys of cell (row, col) of a SparseBoard, made on first use"""
+    keys = _sparse_keys.get((row, col))
+    if keys is None:
+        rng = random.Random(f'{row},{col}')  # Same keys in every process
+        keys = _sparse_keys[(row, col)] = [rng.getrandbits(64) for _ in range(26)]
+    return keys
+
+def rack_counts(letters):
+    """Count of each letter A-Z in letters; ValueError for anything else"""
+    rack = [0] * 26
+    for letter in letters:
+        if not 'A' <= letter <= 'Z':
+            raise ValueError(f"not a tile letter: {letter!r}")
+        rack[ord(letter) - 65] += 1
+    return rack
+
+_neighbor_cache = {}
+
+def neighbor_lists(size):
+    """For each cell index, the indexes of the cells above, below, left and right"""
+    if size not in _neighbor_cache:
+        _neighbor_cache[size] = [[nr * size + nc for nr, nc in ((r - 1, c), (r + 1, c), (r, c - 1), (r, c + 1))
+                                  if 0 <= nr < size and 0 <= nc < size]
+                                 for r in range(size) for c in range(size)]
+    return _neighbor_cache[size]
+
+class Board:
+    """Square grid of tiles plus the rack of letters still to place"""
+
+    def __init__(self, size, letters, lexicon):
+        self.size = size
+        self.lexicon = lexicon
+        self.cells = bytearray(b'.') * (size * size)
+        self.rack = rack_counts(letters)  # Count of each letter not yet on the board
+        self.left = len(letters)  # Letters still in the rack
+        self.tiles = 0  # Tiles on the board
+        # Runs of 2+ letters that are prefixes but not yet words,
+        # keyed by (direction, line, start)
+        self.bad_runs = set()
+        # Whether the tiles are known to form one piece; placed words always
+        # touch the board, so this only goes False for a grid passed in split
+        self.connected = True
+        self.log = []  # Undo log: (move, placed cell indexes, runs added, runs removed)
+        # Let words run through tiles already on the board without spending
+        # rack letters on them (the real game's rule; the original search
+        # spelled whole words from the rack)
+        self.free_crossings = False
+        self.cell_keys, self.rack_keys = zobrist_keys(size, len(letters))
+        self.hash = self.compute_hash()
+        # Open anchors: empty cells next to a tile, where the next word can
+        # attach. touching[i] counts the tiles next to cell i.
+        self.neighbors = neighbor_lists(size)
+        self.touching = bytearray(size * size)
+        self.open_anchors = 0
+
+    @classmethod
+    def from_grid(cls, grid, letters, lexicon):
+        """Board holding a list-of-lists grid (padded out to a square if it is
+        not one); letters already on it leave the rack.
+        Returns None if some run on the grid is not even a prefix."""
+        board = cls(max([len(grid)] + [len(row) for row in grid]), letters, lexicon)
+        for r, row in enumerate(grid):
+            for c, cell in enumerate(row):
+                if cell != '.':
+                    board.cells[r * board.size + c] = ord(cell)
+                    board.tiles += 1
+                    if board.rack[ord(cell) - 65] > 0:
+                        board.rack[ord(cell) - 65] -= 1
+                        board.left -= 1
+        board.bad_runs = board.scan_runs()
+        if board.bad_runs is None:
+            return None
+        board.connected = board.is_connected()
+        board.hash = board.compute_hash()
+        for i, cell in enumerate(board.cells):
+            board.touching[i] = sum(board.cells[j] != EMPTY for j in board.neighbors[i])
+            if cell == EMPTY and board.touching[i]:
+                board.open_anchors += 1
+        return board
+
+    def get(self, row, col):
+        return chr(self.cells[row * self.size + col])
+
+    def tile(self, row, col):
+        """Letter at (row, col), or '.' if it is empty or off the board"""
+        if 0 <= row < self.size and 0 <= col < self.size:
+            return chr(self.cells[row * self.size + col])
+        return '.'
+
+    def lines(self, direction):
+        """(line, first cell, length) of each stretch a new word could use"""
+        return [(i, 0, self.size) for i in range(self.size)]
+
+    def segment(self, i, first, length, direction):
+        """length cells of row i (across) or column i (down) from first, as a string"""
+        return self.line(i, direction)[first:first + length]
+
+    def line(self, i, direction):
+        """Row i (across) or column i (down) as a string"""
+        size = self.size
+        if direction == ACROSS:
+            return self.cells[i * size:(i + 1) * size].decode('ascii')
+        return self.cells[i::size].decode('ascii')
+
+    def grid(self):
+        """The board as a list-of-lists grid"""
+        return [list(self.line(r, ACROSS)) for r in range(self.size)]
+
+    def remaining(self):
+        """Letters still in the rack, in alphabetical order"""
+        return [chr(65 + i) for i, n in enumerate(self.rack) for _ in range(n)]
+
+    # Return (start, letters) of the run of letters through (row, col)
+    def run_at(self, row, col, direction):
+        size, cells = self.size, self.cells
+        if direction == ACROSS:
+            base, pos, step = row * size, col, 1
+        else:
+            base, pos, step = col, row, size
+        start = end = pos
+        while start > 0 and cells[base + (start - 1) * step] != EMPTY:
+            start -= 1
+        while end < size - 1 and cells[base + (end + 1) * step] != EMPTY:
+            end += 1
+        return start, cells[base + start * step:base + end * step + 1:step].decode('ascii')
+
+    def scan_runs(self):
+        """Prefix-but-not-word runs of the whole board, or None if one is not a prefix"""
+        bad_runs = set()
+        for direction in (ACROSS, DOWN):
+            for i in range(self.size):
+                line = self.line(i, direction)
+                for start, run in _runs(line):
+                    if len(run) < 2:
+                        continue
+                    if not self.lexicon.is_prefix(run):
+                        return None
+                    if not self.lexicon.is_word(run):
+                        bad_runs.add((direction, i, start))
+        return bad_runs
+
+    def compute_hash(self):
+        """Zobrist hash of the tiles and rack, computed from scratch"""
+        h = 0
+        for i, cell in enumerate(self.cells):
+            if cell != EMPTY:
+                h ^= self.cell_keys[i * 26 + cell - 65]
+        for letter, count in enumerate(self.rack):
+            h ^= self.rack_keys[letter][count]
+        return h
+
+    def is_connected(self):
+        """Flood fill from the first tile and check it reaches every tile"""
+        size, cells = self.size, self.cells
+        start = next((i for i, cell in enumerate(cells) if cell != EMPTY), None)
+        if start is None:
+            return True
+        seen = {start}
+        stack = [start]
+        while stack:
+            i = stack.pop()
+            r, c = divmod(i, size)
+            for nr, nc in ((r - 1, c), (r + 1, c), (r, c - 1), (r, c + 1)):
+                j = nr * size + nc
+                if 0 <= nr < size and 0 <= nc < size and cells[j] != EMPTY and j not in seen:
+                    seen.add(j)
+                    stack.append(j)
+        return len(seen) == self.tiles
+
+    def is_solved(self):
+        """Every letter placed, every run a word and the tiles in one piece"""
+        return self.left == 0 and not self.bad_runs and (self.connected or self.is_connected())
+
+    def apply(self, word, row, col, direction):
+        """Place word and log the change. Returns False, leaving the board
+        unchanged, if a run it touches can no longer become a word."""
+        size, cells, rack = self.size, self.cells, self.rack
+        cell_keys, rack_keys = self.cell_keys, self.rack_keys
+        first = row * size + col
+        step = 1 if direction == ACROSS else size
+        placed = []
+        h = self.hash
+        for i, letter in enumerate(word):
+            idx = first + i * step
+            if cells[idx] == EMPTY:
+                code = ord(letter) - 65
+                cells[idx] = code + 65
+                n = rack[code]
+                rack[code] = n - 1
+                h ^= cell_keys[idx * 26 + code] ^ rack_keys[code][n] ^ rack_keys[code][n - 1]
+                placed.append(idx)
+                self._touch(idx, 1)
+        self.hash = h
+        self.left -= len(placed)
+        self.tiles += len(placed)
+        ok, added, removed = self._update_runs(row, col, direction, placed)
+        self.log.append(((word, row, col, direction), placed, added, removed))
+        if not ok:
+            self.undo()
+        return ok
+
+    def moves(self):
+        """The (word, row, col, direction) moves applied so far, in order"""
+        return [entry[0] for entry in self.log]
+
+    def undo(self):
+        """Take back the last applied word"""
+        _, placed, added, removed = self.log.pop()
+        cells, rack = self.cells, self.rack
+        cell_keys, rack_keys = self.cell_keys, self.rack_keys
+        h = self.hash
+        for idx in reversed(placed):
+            code = cells[idx] - 65
+            n = rack[code]
+            rack[code] = n + 1
+            h ^= cell_keys[idx * 26 + code] ^ rack_keys[code][n] ^ rack_keys[code][n + 1]
+            cells[idx] = EMPTY
+            self._touch(idx, -1)
+        self.hash = h
+        self.left += len(placed)
+        self.tiles -= len(placed)
+        self.bad_runs -= added
+        self.bad_runs |= removed
+
+    # Keep open_anchors up to date as the tile at idx is added (+1), after
+    # filling the cell, or removed (-1), after emptying it
+    def _touch(self, idx, delta):
+        cells, touching = self.cells, self.touching
+        if touching[idx]:
+            self.open_anchors -= delta  # idx was an open anchor, or is one again
+        for j in self.neighbors[idx]:
+            touching[j] += delta
+            if cells[j] == EMPTY and touching[j] == (1 if delta > 0 else 0):
+                self.open_anchors += delta
+
+    def _coords(self, idx):
+        return divmod(idx, self.size)
+
+    # Re-check only the run along the new word and the crossing runs through
+    # its new cells; every other run is unchanged. Returns (ok, keys added to
+    # bad_runs, keys removed from it) so undo can restore the set.
+    def _update_runs(self, row, col, direction, placed):
+        bad_runs = self.bad_runs
+        added, removed = set(), set()
+        cross = DOWN if direction == ACROSS else ACROSS
+        checks = [(direction, row, col)] + [(cross,) + self._coords(cell) for cell in placed]
+        for run_dir, r, c in checks:
+            start, run = self.run_at(r, c, run_dir)
+            line = r if run_dir == ACROSS else c
+            # Shorter runs merged into this one are no longer runs of their own
+            for key in [k for k in bad_runs if k[0] == run_dir and k[1] == line
+                        and start <= k[2] < start + len(run)]:
+                bad_runs.discard(key)
+                if key in added:
+                    added.discard(key)
+                else:
+                    removed.add(key)
+            if len(run) < 2:
+                continue
+            if not self.lexicon.is_prefix(run):
+                return False, added, removed
+            key = (run_dir, line, start)
+            if not self.lexicon.is_word(run) and key not in bad_runs:
+                bad_runs.add(key)
+                if key in removed:
+                    removed.discard(key)
+                else:
+                    added.add(key)
+        return True, added, removed
+
+class SparseBoard(Board):
+    """Board without edges: tiles keyed by (row, col), growing in any
+    direction from the first word, which goes across from (0, 0)"""
+
+    def __init__(self, letters, lexicon):
+        self.lexicon = lexicon
+        self.cells = {}  # (row, col) -> letter code + 65, for each tile
+        self.rack = rack_counts(letters)
+        self.left = len(letters)
+        self.tiles = 0
+        self.bad_runs = set()
+        self.connected = True
+        # Undo log: (move, placed cells, runs added, runs removed, bounds before)
+        self.log = []
+        self.free_crossings = False
+        _, self.rack_keys = zobrist_keys(0, len(letters))
+        self.hash = self.compute_hash()
+        self.touching = {}  # (row, col) -> tiles next to it, for cells next to a tile
+        self.open_anchors = 0
+        # Bounding box of the tiles, (top, left, bottom, right); None while empty
+        self.bounds = None
+
+    @classmethod
+    def from_grid(cls, grid, letters, lexicon):
+        """Board holding a list-of-lists grid at (0, 0); letters already on it
+        leave the rack. Returns None if some run on the grid is not even a prefix."""
+        board = cls(letters, lexicon)
+        for r, row in enumerate(grid):
+            for c, cell in enumerate(row):
+                if cell != '.':
+                    board.cells[(r, c)] = ord(cell)
+                    board.tiles += 1
+                    board._touch((r, c), 1)
+                    board._grow(r, c, r, c)
+                    if board.rack[ord(cell) - 65] > 0:
+                        board.rack[ord(cell) - 65] -= 1
+                        board.left -= 1
+        board.bad_runs = board.scan_runs()
+        if board.bad_runs is None:
+            return None
+        board.connected = board.is_connected()
+        board.hash = board.compute_hash()
+        return board
+
+    def get(self, row, col):
+        return chr(self.cells.get((row, col), EMPTY))
+
+    tile = get
+
+    def height(self):
+        return self.bounds[2] - self.bounds[0] + 1 if self.bounds else 0
+
+    def width(self):
+        return self.bounds[3] - self.bounds[1] + 1 if self.bounds else 0
+
+    def lines(self, direction):
+        """(line, first cell, length) of each stretch a new word could use:
+        the lines through and beside the tiles, reaching as many cells past
+        them as there are letters left (an empty board: row 0 from (0, 0))"""
+        if self.left == 0:
+            return []
+        reach = self.left
+        if self.bounds is None:
+            return [(0, 0, reach)] if direction == ACROSS else []
+        top, left, bottom, right = self.bounds
+        if direction == ACROSS:
+            return [(r, left - reach, right - left + 1 + 2 * reach) for r in range(top - 1, bottom + 2)]
+        return [(c, top - reach, bottom - top + 1 + 2 * reach) for c in range(left - 1, right + 2)]
+
+    def segment(self, i, first, length, direction):
+        cells = self.cells
+        if direction == ACROSS:
+            return ''.join(chr(cells.get((i, c), EMPTY)) for c in range(first, first + length))
+        return ''.join(chr(cells.get((r, i), EMPTY)) for r in range(first, first + length))
+
+    def grid(self):
+        """The tiles' bounding box as a list-of-lists grid"""
+        if self.bounds is None:
+            return []
+        top, left, bottom, right = self.bounds
+        return [list(self.segment(r, left, right - left + 1, ACROSS)) for r in range(top, bottom + 1)]
+
+    def run_at(self, row, col, direction):
+        cells = self.cells
+        if direction == ACROSS:
+            start = end = col
+            while (row, start - 1) in cells:
+                start -= 1
+            while (row, end + 1) in cells:
+                end += 1
+            return start, self.segment(row, start, end - start + 1, ACROSS)
+        start = end = row
+        while (start - 1, col) in cells:
+            start -= 1
+        while (end + 1, col) in cells:
+            end += 1
+        return start, self.segment(col, start, end - start + 1, DOWN)
+
+    def scan_runs(self):
+        bad_runs = set()
+        if self.bounds is None:
+            return bad_runs
+        top, left, bottom, right = self.bounds
+        for direction, lines, first, length in ((ACROSS, range(top, bottom + 1), left, right - left + 1),
+                                                (DOWN, range(left, right + 1), top, bottom - top + 1)):
+            for i in lines:
+                for start, run in _runs(self.segment(i, first, length, direction)):
+                    if len(run) < 2:
+                        continue
+                    if not self.lexicon.is_prefix(run):
+                        return None
+                    if not self.lexicon.is_word(run):
+                        bad_runs.add((direction, i, first + start))
+        return bad_runs
+
+    def compute_hash(self):
+        h = 0
+        for (r, c), cell in self.cells.items():
+            h ^= cell_keys_at(r, c)[cell - 65]
+        for letter, count in enumerate(self.rack):
+            h ^= self.rack_keys[letter][count]
+        return h
+
+    def is_connected(self):
+        cells = self.cells
+        if not cells:
+            return True
+        start = next(iter(cells))
+        seen = {start}
+        stack = [start]
+        while stack:
+            r, c = stack.pop()
+            for cell in ((r - 1, c), (r + 1, c), (r, c - 1), (r, c + 1)):
+                if cell in cells and cell not in seen:
+                    seen.add(cell)
+                    stack.append(cell)
+        return len(seen) == self.tiles
+
+    def apply(self, word, row, col, direction):
+        cells, rack, rack_keys = self.cells, self.rack, self.rack_keys
+        dr, dc = (0, 1) if direction == ACROSS else (1, 0)
+        placed = []
+        h = self.hash
+        for i, letter in enumerate(word):
+            cell = (row + i * dr, col + i * dc)
+            if cell not in cells:
+                code = ord(letter) - 65
+                cells[cell] = code + 65
+                n = rack[code]
+                rack[code] = n - 1
+                h ^= cell_keys_at(*cell)[code] ^ rack_keys[code][n] ^ rack_keys[code][n - 1]
+                placed.append(cell)
+                self._touch(cell, 1)
+        self.hash = h
+        self.left -= len(placed)
+        self.tiles += len(placed)
+        bounds = self.bounds
+        self._grow(row, col, row + (len(word) - 1) * dr, col + (len(word) - 1) * dc)
+        ok, added, removed = self._update_runs(row, col, direction, placed)
+        self.log.append(((word, row, col, direction), placed, added, removed, bounds))
+        if not ok:
+            self.undo()
+        return ok
+
+    def undo(self):
+        _, placed, added, removed, self.bounds = self.log.pop()
+        cells, rack, rack_keys = self.cells, self.rack, self.rack_keys
+        h = self.hash
+        for cell in reversed(placed):
+            code = cells.pop(cell) - 65
+            n = rack[code]
+            rack[code] = n + 1
+            h ^= cell_keys_at(*cell)[code] ^ rack_keys[code][n] ^ rack_keys[code][n + 1]
+            self._touch(cell, -1)
+        self.hash = h
+        self.left += len(placed)
+        self.tiles -= len(placed)
+        self.bad_runs -= added
+        self.bad_runs |= removed
+
+    # Widen the bounding box to take in rows top..bottom and columns left..right
+    def _grow(self, top, left, bottom, right):
+        if self.bounds is not None:
+            t, l, b, r = self.bounds
+            top, left, bottom, right = min(t, top), min(l, left), max(b, bottom), max(r, right)
+        self.bounds = (top, left, bottom, right)
+
+    def _touch(self, cell, delta):
+        cells, touching = self.cells, self.touching
+        if cell in touching:
+            self.open_anchors -= delta
+        r, c = cell
+        for other in ((r - 1, c), (r + 1, c), (r, c - 1), (r, c + 1)):
+            count = touching.get(other, 0) + delta
+            if count:
+                touching[other] = count
+            else:
+                del touching[other]
+            if other not in cells and count == (1 if delta > 0 else 0):
+                self.open_anchors += delta
+
+    def _coords(self, cell):
+        return cell
+
+# (start, letters) of each run of tiles in a line
+def _runs(line):
+    pos = 0
+    while pos < len(line):
+        if line[pos] == '.':
+            pos += 1
+            continue
+        start = pos
+        while pos < len(line) and line[pos] != '.':
+            pos += 1
+        yield start, line[start:pos]
@@ -1,44 +1,69 @@
 #! /usr/bin/env python3
+import os
+import time
 import sqlite3
+from lexicon import Lexicon
 
 # Path to the dictionary file
 DICT_FILE = 'Collins Scrabble Words (2019).txt'
 # Path to the SQLite database file
 DB_FILE = 'words.db'
+# Path to the binary lexicon the tools memory-map
+LEX_FILE = 'words.lex'
 
-# Connect to the SQLite database (it will be created if it doesn't exist)
-conn = sqlite3.connect(DB_FILE)
+LETTERS = [chr(code) for code in range(ord('A'), ord('Z') + 1)]
+
+start_time = time.time()
+
+# Read the dictionary: each word once, in order
+with open(DICT_FILE) as f:
+    words = sorted({line.strip().upper() for line in f if line.strip().isalpha()})
+
+# Build into a fresh file and swap it in at the end, so a rerun replaces the
+# old database instead of adding the words again, and a failed build leaves
+# the old one in place
+tmp_file = DB_FILE + '.tmp'
+if os.path.exists(tmp_file):
+    os.remove(tmp_file)
+conn = sqlite3.connect(tmp_file)
 c = conn.cursor()
 
-# Create the table: sorted_letters (TEXT), word (TEXT)
-c.execute('''
-CREATE TABLE IF NOT EXISTS anagrams (
-    sorted_letters TEXT,
-    word TEXT
-)
+# Nothing needs protecting until the file is complete: keep the rollback
+# journal in memory and don't wait for the disk on every page
+c.execute('PRAGMA journal_mode = MEMORY')
+c.execute('PRAGMA synchronous = OFF')
+
+# One row per word, stored in word order (WITHOUT ROWID makes word the
+# table's own B-tree key, so prefix and range queries on word are
+# O(log n)), with its sorted letters, length and a count per letter
+# (columns a to z) for rack queries
+c.execute(f'''
+CREATE TABLE anagrams (
+    word TEXT NOT NULL PRIMARY KEY,
+    sorted_letters TEXT NOT NULL,
+    length INTEGER NOT NULL,
+    {', '.join(f'{letter.lower()} INTEGER NOT NULL' for letter in LETTERS)}
+) WITHOUT ROWID
 ''')
 
-# Create an index on sorted_letters for fast lookups
-c.execute('CREATE INDEX IF NOT EXISTS idx_sorted_letters ON anagrams(sorted_letters)')
+# Insert every word in one executemany, in key order
+rows = ((word, ''.join(sorted(word)), len(word)) + tuple(word.count(letter) for letter in LETTERS)
+        for word in words)
+c.executemany(f'INSERT INTO anagrams VALUES ({", ".join("?" * (3 + len(LETTERS)))})', rows)
 
-# Read the dictionary and insert each word with its sorted letters
-with open(DICT_FILE) as f:
-    batch = []
-    BATCH_SIZE = 1000
-    for line in f:
-        word = line.strip().upper()
-        if word.isalpha():
-            sorted_letters = ''.join(sorted(word))
-            batch.append((sorted_letters, word))
-            if len(batch) >= BATCH_SIZE:
-                c.executemany('INSERT INTO anagrams (sorted_letters, word) VALUES (?, ?)', batch)
-                batch = []
-    # Insert any remaining rows
-    if batch:
-        c.executemany('INSERT INTO anagrams (sorted_letters, word) VALUES (?, ?)', batch)
+# Create the index on sorted_letters for fast lookups, now the rows are in
+c.execute('CREATE INDEX idx_sorted_letters ON anagrams(sorted_letters)')
 
 # Commit and close
 conn.commit()
 conn.close()
+os.replace(tmp_file, DB_FILE)
+
+db_time = time.time() - start_time
+print(f"Database '{DB_FILE}' built from '{DICT_FILE}' with {len(words):,} words "
+      f"in {db_time:.2f} seconds ({os.path.getsize(DB_FILE) / 1e6:.1f} MB).")
 
-print(f"Database '{DB_FILE}' built from '{DICT_FILE}' with index on sorted_letters.") 
+# Write the binary lexicon (word table, sorted-letters index and DAWG)
+Lexicon(words).save(LEX_FILE)
+print(f"Lexicon '{LEX_FILE}' written in {time.time() - start_time - db_time:.2f} seconds "
+      f"({os.path.getsize(LEX_FILE) / 1e6:.1f} MB).")
@@ -0,0 +1,49 @@
+#!/usr/bin/env python3
+# Client side of server.py, kept apart from it so the scripts' --server
+# option doesn't load the lexicon, NumPy or the solver just to ask.
+import os
+import json
+import socket
+
+# Default socket path of server.py
+SOCKET_FILE = 'bananagram.sock'
+
+class ServerError(Exception):
+    """An error reply from the server"""
+
+# (host, port) if address is HOST:PORT, None if it's a Unix socket path.
+# Paths may contain ':' too: an address that names an existing file, has a
+# '/' in it, or doesn't end in a port number is a path.
+def parse_address(address):
+    host, sep, port = address.rpartition(':')
+    if not host or not port.isdigit() or '/' in address or os.path.exists(address):
+        return None
+    return host, int(port)
+
+# Blocking client for the scripts' --server option: one connection, any
+# number of calls. address is a socket path or HOST:PORT.
+class Client:
+    def __init__(self, address=SOCKET_FILE):
+        tcp = parse_address(address)
+        if tcp is not None:
+            self.sock = socket.create_connection(tcp)
+        else:
+            self.sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+            self.sock.connect(address)
+        self.file = self.sock.makefile('rwb')
+
+    def call(self, op, **params):
+        """Send one request and return its result; raises ServerError on an error reply"""
+        self.file.write(json.dumps(dict(params, op=op)).encode() + b'\n')
+        self.file.flush()
+        line = self.file.readline()
+        if not line:
+            raise ServerError('server closed the connection')
+        reply = json.loads(line)
+        if 'error' in reply:
+            raise ServerError(reply['error'])
+        return reply['result']
+
+    def close(self):
+        self.file.close()
+        self.sock.close()
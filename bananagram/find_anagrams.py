@@ -1,32 +1,80 @@
 #!/usr/bin/env python3
+import os
 import sys
+import json
 import sqlite3
+import argparse
+from lexicon import load_lexicon
 
 DB_FILE = 'words.db'
+LEX_FILE = 'words.lex'
 
-if len(sys.argv) != 2:
-    print("Usage: python find_anagrams.py WORD")
-    sys.exit(1)
+parser = argparse.ArgumentParser(description='Find the anagrams of words')
+parser.add_argument('words', nargs='*', metavar='WORD', help="words to look up ('-' reads words from stdin)")
+parser.add_argument('-f', '--file', help='read words from FILE, one per line')
+parser.add_argument('--json', action='store_true', help='write one JSON object per word')
+parser.add_argument('--lexicon', action='store_true',
+                    help='look words up in the mapped words.lex: starts faster, but the database map is faster for many words')
+parser.add_argument('--server', action='store_true', help='ask a running server.py instead of loading the lexicon')
+parser.add_argument('--address', default='bananagram.sock',
+                    help="the server's socket path or HOST:PORT (default bananagram.sock)")
+args = parser.parse_args()
+if not args.words and not args.file:
+    parser.error('give a WORD, - for stdin, or --file FILE')
 
-input_word = sys.argv[1].strip().upper()
-if not input_word.isalpha():
-    print("Please provide a single alphabetic word.")
-    sys.exit(1)
+# Words to look up, read lazily so results stream out as input streams in
+def input_words():
+    for arg in args.words:
+        if arg == '-':
+            for line in sys.stdin:
+                yield line.strip()
+        else:
+            yield arg.strip()
+    if args.file:
+        with open(args.file) as f:
+            for line in f:
+                yield line.strip()
 
-# Alphabetize the letters in the input word
-sorted_letters = ''.join(sorted(input_word))
+# Ask the server, or look the letters up in the mapped lexicon (by request,
+# or when there's no database). Otherwise a few words from the command line
+# are each one indexed query; a batch from stdin or a file reads the
+# database once into a sorted_letters -> words map so each word is a dict
+# lookup, which pays off after a few thousand words
+if args.server:
+    from client import Client
+    client = Client(args.address)
+    find = lambda letters: client.call('anagrams', letters=letters)
+elif args.lexicon or not os.path.exists(DB_FILE):
+    find = load_lexicon(LEX_FILE, DB_FILE).anagrams
+elif args.file or '-' in args.words:
+    groups = {}
+    conn = sqlite3.connect(DB_FILE)
+    for sorted_letters, word in conn.execute('SELECT sorted_letters, word FROM anagrams ORDER BY word'):
+        groups.setdefault(sorted_letters, []).append(word)
+    conn.close()
+    find = lambda letters: groups.get(''.join(sorted(letters)), [])
+else:
+    conn = sqlite3.connect(DB_FILE)
+    find = lambda letters: [row[0] for row in conn.execute(
+        'SELECT word FROM anagrams WHERE sorted_letters = ? ORDER BY word', (''.join(sorted(letters)),))]
 
-# Connect to the database and search for anagrams
-conn = sqlite3.connect(DB_FILE)
-c = conn.cursor()
-c.execute('SELECT word FROM anagrams WHERE sorted_letters = ?', (sorted_letters,))
-results = c.fetchall()
-conn.close()
+for input_word in input_words():
+    if not input_word:
+        continue
+    input_word = input_word.upper()
+    if not input_word.isalpha():
+        if args.json:
+            print(json.dumps({'word': input_word, 'error': 'not alphabetic'}))
+        else:
+            print(f"Skipping '{input_word}': please provide alphabetic words.", file=sys.stderr)
+        continue
 
-# Print the found anagrams (excluding the input word itself, if desired)
-anagrams = [row[0] for row in results if row[0] != input_word]
+    # Drop the input word itself from its anagrams
+    anagrams = [word for word in find(input_word) if word != input_word]
 
-if anagrams:
-    print(f"Anagrams for '{input_word}': {', '.join(anagrams)}")
-else:
-    print(f"No anagrams found for '{input_word}'.") 
\ No newline at end of file
+    if args.json:
+        print(json.dumps({'word': input_word, 'anagrams': anagrams}))
+    elif anagrams:
+        print(f"Anagrams for '{input_word}': {', '.join(anagrams)}")
+    else:
+        print(f"No anagrams found for '{input_word}'.")
@@ -0,0 +1,105 @@
+#!/usr/bin/env python3
+# Letter-count matrix of the lexicon, for vectorized rack queries.
+# Entry [letter, i] holds how many of that letter word i of the lexicon has
+# (a uint8), so "which words can this rack spell" is one comparison of the
+# matrix against the rack's counts. The matrix is stored letter by letter
+# (26 x words rather than words x 26) so each letter's counts are
+# contiguous: the comparison runs one letter at a time over a flat array,
+# and letters the rack has more of than any word needs are skipped.
+# The matrix is saved as a .npy file next to words.lex and memory-mapped
+# on later runs, while the lexicon's words are the ones it was built from.
+import os
+import sys
+import json
+import hashlib
+import numpy as np
+
+# Path to the saved matrix, and to the signature of the words it counts
+COUNTS_FILE = 'words.counts.npy'
+
+def signature_file(path=COUNTS_FILE):
+    return os.path.splitext(path)[0] + '.json'
+
+# Hash of the lexicon's words, whichever file they were loaded from
+def lexicon_signature(lexicon):
+    digest = hashlib.blake2b(digest_size=16)
+    digest.update(lexicon.word_offsets)
+    digest.update(lexicon.word_blob)
+    return digest.hexdigest()
+
+# Count the letters of every word in the lexicon: a (26 x words) uint8 matrix
+def count_letters(lexicon):
+    offsets = np.frombuffer(lexicon.word_offsets, dtype=np.uint32).astype(np.intp)
+    blob = np.frombuffer(lexicon.word_blob, dtype=np.uint8)
+    count = len(offsets) - 1
+    words = np.repeat(np.arange(count), np.diff(offsets))
+    counts = np.bincount((blob - 65).astype(np.intp) * count + words, minlength=26 * count)
+    return np.minimum(counts, 255).astype(np.uint8).reshape(26, count)
+
+# Letter counts of a rack, in the matrix's layout
+def rack_counts(letters):
+    codes = np.frombuffer(letters.upper().encode('ascii'), dtype=np.uint8) - 65
+    return np.minimum(np.bincount(codes, minlength=26), 255).astype(np.uint8)
+
+class LetterCounts:
+    """Words of a lexicon as letter counts, answering rack queries with NumPy"""
+
+    def __init__(self, lexicon, counts=None):
+        self.lexicon = lexicon
+        self.counts = count_letters(lexicon) if counts is None else counts
+        self.lengths = np.diff(np.frombuffer(lexicon.word_offsets, dtype=np.uint32))
+        self.most = self.counts.max(axis=1)  # Most of each letter any word has
+
+    @classmethod
+    def load(cls, lexicon, path=COUNTS_FILE):
+        """Memory-map the saved matrix for lexicon, building and saving it
+        first if it is missing or was built from other words"""
+        signature = lexicon_signature(lexicon)
+        try:
+            with open(signature_file(path)) as f:
+                saved = json.load(f).get('words')
+            if saved == signature:
+                counts = np.load(path, mmap_mode='r')
+                if counts.shape == (26, len(lexicon)) and counts.dtype == np.uint8:
+                    return cls(lexicon, counts)
+        except (OSError, ValueError):
+            pass  # Missing or unreadable: build it again
+        self = cls(lexicon)
+        try:
+            self.save(path, signature)
+        except OSError as e:
+            print(f"Could not save {path}: {e}", file=sys.stderr)
+        return self
+
+    def save(self, path=COUNTS_FILE, signature=None):
+        # The signature goes last, so it only ever vouches for a complete matrix
+        signature = lexicon_signature(self.lexicon) if signature is None else signature
+        tmp = path + '.tmp.npy'
+        np.save(tmp, self.counts)
+        os.replace(tmp, path)
+        tmp = signature_file(path) + '.tmp'
+        with open(tmp, 'w') as f:
+            json.dump({'words': signature}, f)
+        os.replace(tmp, signature_file(path))
+
+    def fits(self, letters):
+        """Boolean mask of the words that can be spelled from letters"""
+        rack = rack_counts(letters)
+        ok = np.ones(self.counts.shape[1], dtype=bool)
+        for letter in np.flatnonzero(rack < self.most):
+            ok &= self.counts[letter] <= rack[letter]
+        return ok
+
+    def words_from_rack(self, letters, min_length=1):
+        """Every word that can be spelled from letters (each tile used once)"""
+        ids = np.flatnonzero(self.fits(letters) & (self.lengths >= min_length))
+        return [self.lexicon.word(i) for i in ids]
+
+    def longest(self, letters):
+        """(length, words) of the longest words the letters can spell; (0, []) if none"""
+        ids = np.flatnonzero(self.fits(letters))
+        if not len(ids):
+            return 0, []
+        lengths = self.lengths[ids]
+        max_length = int(lengths.max())
+        return max_length, [self.lexicon.word(i) for i in ids[lengths == max_length]]
@@ -0,0 +1,470 @@
+#!/usr/bin/env python3
+# In-memory word list for the Bananagrams tools.
+# The words are packed into a minimal DAWG (directed acyclic word graph)
+# kept in flat arrays, so word and prefix checks are a short walk from the
+# root instead of a trip to SQLite.
+# builddb.py also saves the arrays to words.lex, which the tools mmap so that
+# startup is near-instant and pool workers share the same pages.
+import os
+import sys
+import mmap
+import struct
+import sqlite3
+import itertools
+from array import array
+from collections import Counter
+from bisect import bisect_left
+
+# Database file path
+DB_FILE = 'words.db'
+# Binary lexicon file path (written by builddb.py)
+LEX_FILE = 'words.lex'
+
+# Binary lexicon layout: magic, version, then (offset, length) of each section.
+# All integers are little-endian; sections start on 8-byte boundaries.
+LEX_MAGIC = b'BGLX'
+LEX_VERSION = 2
+SECTIONS = (
+    'word_offsets',  # u32[words+1] start of each word in word_blob
+    'word_blob',     # the words, alphabetical, concatenated
+    'key_offsets',   # u32[keys+1] start of each sorted-letters key in key_blob
+    'key_blob',      # the sorted-letters keys, in order, concatenated
+    'key_first',     # u32[keys+1] start of each key's word ids in key_words
+    'key_words',     # u32[words] word ids grouped by key
+    'first',         # u32[nodes+1] first DAWG edge of each node
+    'final',         # u8[nodes] 1 if the node ends a word
+    'labels',        # u8[edges] letter on each edge
+    'targets',       # u32[edges] node each edge leads to
+    'rack_first',    # the same four arrays for a DAWG of the sorted-letters keys,
+    'rack_final',    # walked with a rack's letter counts to find every key
+    'rack_labels',   # (and so every word) the rack can spell
+    'rack_targets',
+)
+U32_SECTIONS = {'word_offsets', 'key_offsets', 'key_first', 'key_words', 'first', 'targets',
+                'rack_first', 'rack_targets'}
+HEADER = struct.Struct('<4sI' + 'II' * len(SECTIONS))
+
+# Temporary node used only while building the DAWG
+class _BuildNode:
+    __slots__ = ('edges', 'final')
+
+    def __init__(self):
+        self.edges = {}
+        self.final = False
+
+    def signature(self):
+        # Children are already minimized, so their ids identify them
+        return (self.final, tuple((l, id(n)) for l, n in self.edges.items()))
+
+# Build a minimal DAWG from sorted, unique words (Daciuk et al. 2000)
+def _build_dawg(words):
+    root = _BuildNode()
+    register = {}
+    unchecked = []  # (parent, letter, child) along the last word added
+    previous = ''
+
+    def minimize(down_to):
+        while len(unchecked) > down_to:
+            parent, letter, child = unchecked.pop()
+            sig = child.signature()
+            if sig in register:
+                parent.edges[letter] = register[sig]
+            else:
+                register[sig] = child
+
+    for word in words:
+        if word <= previous:
+            raise ValueError(f"Words must be sorted and unique: {previous!r} then {word!r}")
+        common = 0
+        for a, b in zip(word, previous):
+            if a != b:
+                break
+            common += 1
+        minimize(common)
+        node = unchecked[-1][2] if unchecked else root
+        for letter in word[common:]:
+            child = _BuildNode()
+            node.edges[letter] = child
+            unchecked.append((node, letter, child))
+            node = child
+        node.final = True
+        previous = word
+    minimize(0)
+    return root
+
+# Flatten the DAWG into arrays: node n owns edges first[n]..first[n+1]-1,
+# edge e is labelled labels[e] and leads to node targets[e]
+def _flatten(root):
+    ids = {id(root): 0}
+    order = [root]
+    first = array('I', [0])
+    labels = bytearray()
+    targets = array('I')
+    final = bytearray()
+    i = 0
+    while i < len(order):
+        node = order[i]
+        final.append(node.final)
+        for letter, child in node.edges.items():
+            if id(child) not in ids:
+                ids[id(child)] = len(order)
+                order.append(child)
+            labels.append(ord(letter))
+            targets.append(ids[id(child)])
+        first.append(len(labels))
+        i += 1
+    return first, bytes(labels), targets, bytes(final)
+
+# Pack strings end to end; returns (offsets, blob)
+def _pack_strings(strings):
+    offsets = array('I', [0])
+    for s in strings:
+        offsets.append(offsets[-1] + len(s))
+    return offsets, ''.join(strings).encode('ascii')
+
+# Sequence view of a packed string table, so bisect can search it in place
+class _StringTable:
+    def __init__(self, offsets, blob):
+        self.offsets = offsets
+        self.blob = blob
+
+    def __len__(self):
+        return len(self.offsets) - 1
+
+    def __getitem__(self, i):
+        return bytes(self.blob[self.offsets[i]:self.offsets[i + 1]])
+
+class Lexicon:
+    """Word list answering word, prefix, anagram and completion queries"""
+
+    def __init__(self, words):
+        words = sorted({w.strip().upper() for w in words if w.strip().isalpha()})
+        self.word_offsets, self.word_blob = _pack_strings(words)
+        # Sorted-letters index: each key lists the ids of its words
+        groups = {}
+        for i, word in enumerate(words):
+            groups.setdefault(''.join(sorted(word)), []).append(i)
+        keys = sorted(groups)
+        self.key_offsets, self.key_blob = _pack_strings(keys)
+        self.key_first = array('I', [0])
+        self.key_words = array('I')
+        for key in keys:
+            self.key_words.extend(groups[key])
+            self.key_first.append(len(self.key_words))
+        self.first, self.labels, self.targets, self.final = _flatten(_build_dawg(words))
+        # Keys are sorted strings, so a walk only ever adds letters in order
+        (self.rack_first, self.rack_labels,
+         self.rack_targets, self.rack_final) = _flatten(_build_dawg(keys))
+        self._mm = None
+
+    def save(self, path=LEX_FILE):
+        """Write the lexicon as a binary file that load() can mmap"""
+        parts = []
+        for name in SECTIONS:
+            data = getattr(self, name)
+            if name in U32_SECTIONS:
+                data = array('I', data)
+                if sys.byteorder != 'little':
+                    data.byteswap()
+            parts.append(bytes(data))
+        spans = []
+        offset = HEADER.size
+        for part in parts:
+            offset = (offset + 7) & ~7
+            spans += [offset, len(part)]
+            offset += len(part)
+        with open(path + '.tmp', 'wb') as f:
+            f.write(HEADER.pack(LEX_MAGIC, LEX_VERSION, *spans))
+            for part, start in zip(parts, spans[::2]):
+                f.write(b'\0' * (start - f.tell()))
+                f.write(part)
+        # Replace atomically so running tools never map a half-written file
+        os.replace(path + '.tmp', path)
+
+    @classmethod
+    def load(cls, path=LEX_FILE):
+        """Memory-map a lexicon written by save()"""
+        with open(path, 'rb') as f:
+            mm = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        if len(mm) < HEADER.size:
+            raise ValueError(f"{path} is not a lexicon file")
+        magic, version, *spans = HEADER.unpack_from(mm)
+        if magic != LEX_MAGIC:
+            raise ValueError(f"{path} is not a lexicon file")
+        if version != LEX_VERSION:
+            raise ValueError(f"{path} is version {version}, expected {LEX_VERSION}; rerun builddb.py")
+        self = cls.__new__(cls)
+        self._mm = mm
+        view = memoryview(mm)
+        for name, start, length in zip(SECTIONS, spans[::2], spans[1::2]):
+            part = view[start:start + length]
+            if name in U32_SECTIONS:
+                if sys.byteorder == 'little':
+                    part = part.cast('I')
+                else:
+                    part = array('I', bytes(part))
+                    part.byteswap()
+            setattr(self, name, part)
+        # Edge labels are searched with bytes.find, so keep a (small) copy
+        self.labels = bytes(self.labels)
+        self.rack_labels = bytes(self.rack_labels)
+        return self
+
+    @classmethod
+    def from_db(cls, db_file=DB_FILE):
+        """Load every word from the anagrams table of a words.db"""
+        conn = sqlite3.connect(db_file)
+        try:
+            return cls(row[0] for row in conn.execute('SELECT word FROM anagrams'))
+        finally:
+            conn.close()
+
+    @classmethod
+    def from_file(cls, path):
+        """Load a plain word list, one word per line"""
+        with open(path) as f:
+            return cls(f)
+
+    def __len__(self):
+        return len(self.word_offsets) - 1
+
+    def __contains__(self, word):
+        return self.is_word(word)
+
+    def word(self, i):
+        """Return the word with the given id (ids are in alphabetical order)"""
+        return bytes(self.word_blob[self.word_offsets[i]:self.word_offsets[i + 1]]).decode('ascii')
+
+    def words(self):
+        """Yield every word in alphabetical order"""
+        for i in range(len(self)):
+            yield self.word(i)
+
+    def anagrams(self, letters):
+        """Return the words spelled with exactly these letters"""
+        key = ''.join(sorted(letters.upper())).encode('ascii', 'replace')
+        keys = _StringTable(self.key_offsets, self.key_blob)
+        i = bisect_left(keys, key)
+        if i == len(keys) or keys[i] != key:
+            return []
+        return [self.word(j) for j in self.key_words[self.key_first[i]:self.key_first[i + 1]]]
+
+    def rack_keys(self, letters):
+        """Yield the sorted-letters key of every word that can be spelled from
+        letters (a sub-multiset), in time proportional to the keys visited"""
+        counts = Counter(letters.upper())
+        avail = sorted(counts)
+        codes = [ord(l) for l in avail]
+        left = [counts[l] for l in avail]
+        first, labels, targets, final = self.rack_first, self.rack_labels, self.rack_targets, self.rack_final
+
+        # Only letters from avail[i] on can follow, since keys are sorted
+        def visit(node, i, key):
+            if final[node]:
+                yield key
+            start, end = first[node], first[node + 1]
+            for j in range(i, len(codes)):
+                if left[j]:
+                    e = labels.find(codes[j], start, end)
+                    if e >= 0:
+                        left[j] -= 1
+                        yield from visit(targets[e], j, key + avail[j])
+                        left[j] += 1
+                        start = e + 1
+
+        yield from visit(0, 0, '')
+
+    def words_from_rack(self, letters, min_length=1):
+        """Yield every word that can be spelled from letters"""
+        for key in self.rack_keys(letters):
+            if len(key) >= min_length:
+                yield from self.anagrams(key)
+
+    # Walking the DAWG one letter at a time (used by the move generator)
+    root = 0
+
+    def step(self, node, letter):
+        """Return the node reached from node by letter, or None"""
+        e = self.labels.find(ord(letter), self.first[node], self.first[node + 1])
+        return None if e < 0 else self.targets[e]
+
+    def is_final(self, node):
+        return self.final[node] == 1
+
+    # Follow the letters of s from the root; returns the node reached or -1
+    def _walk(self, s, node=0):
+        first, labels, targets = self.first, self.labels, self.targets
+        for ch in s.upper().encode('ascii', 'replace'):
+            e = labels.find(ch, first[node], first[node + 1])
+            if e < 0:
+                return -1
+            node = targets[e]
+        return node
+
+    def is_word(self, word):
+        node = self._walk(word)
+        return node >= 0 and self.final[node] == 1
+
+    # A word counts as a prefix of itself, as with SQL LIKE 'WORD%'
+    def is_prefix(self, prefix):
+        return self._walk(prefix) >= 0
+
+    def completions(self, prefix=''):
+        """Yield every word starting with prefix, in alphabetical order"""
+        prefix = prefix.upper()
+        node = self._walk(prefix)
+        if node < 0:
+            return
+        first, labels, targets, final = self.first, self.labels, self.targets, self.final
+        stack = [(node, prefix)]
+        while stack:
+            node, word = stack.pop()
+            if final[node]:
+                yield word
+            # Push in reverse so the smallest letter is visited first
+            for e in range(first[node + 1] - 1, first[node] - 1, -1):
+                stack.append((targets[e], word + chr(labels[e])))
+
+class SqliteLexicon:
+    """Same queries as Lexicon, answered directly from words.db"""
+
+    def __init__(self, db_file=DB_FILE):
+        self.conn = sqlite3.connect(db_file)
+        # Databases built by builddb.py have a letter-count column per letter
+        columns = {row[1] for row in self.conn.execute('PRAGMA table_info(anagrams)')}
+        self.letter_columns = all(chr(code) in columns for code in range(ord('a'), ord('z') + 1))
+
+    def close(self):
+        self.conn.close()
+
+    def __len__(self):
+        return self.conn.execute('SELECT COUNT(*) FROM anagrams').fetchone()[0]
+
+    def __contains__(self, word):
+        return self.is_word(word)
+
+    # Nodes are just the prefixes themselves
+    root = ''
+
+    def step(self, node, letter):
+        node += letter
+        return node if self.is_prefix(node) else None
+
+    def is_final(self, node):
+        return self.is_word(node)
+
+    def is_word(self, word):
+        word = word.upper()
+        sorted_letters = ''.join(sorted(word))
+        c = self.conn.execute('SELECT word FROM anagrams WHERE sorted_letters = ? AND word = ?',
+                              (sorted_letters, word))
+        return c.fetchone() is not None
+
+    # Words starting with prefix lie in [prefix, prefix + '\x7f'), a range the
+    # word index answers in O(log n) (LIKE 'PREFIX%' scans the whole table)
+    def is_prefix(self, prefix):
+        prefix = prefix.upper()
+        c = self.conn.execute('SELECT 1 FROM anagrams WHERE word >= ? AND word < ? LIMIT 1',
+                              (prefix, prefix + '\x7f'))
+        return c.fetchone() is not None
+
+    def words(self):
+        for row in self.conn.execute('SELECT word FROM anagrams ORDER BY word'):
+            yield row[0]
+
+    def anagrams(self, letters):
+        sorted_letters = ''.join(sorted(letters.upper()))
+        c = self.conn.execute('SELECT word FROM anagrams WHERE sorted_letters = ? ORDER BY word',
+                              (sorted_letters,))
+        return [row[0] for row in c]
+
+    def rack_keys(self, letters):
+        if self.letter_columns:
+            # One pass comparing the letter-count columns with the rack
+            counts = Counter(letters.upper())
+            conditions = ' AND '.join(f'{chr(code)} <= ?' for code in range(ord('a'), ord('z') + 1))
+            c = self.conn.execute(f'SELECT DISTINCT sorted_letters FROM anagrams WHERE length <= ? AND {conditions}',
+                                  [len(letters)] + [counts[chr(code)] for code in range(ord('A'), ord('Z') + 1)])
+            for row in c:
+                yield row[0]
+            return
+        keys = set()
+        for length in range(1, len(letters) + 1):
+            for combo in itertools.combinations(sorted(letters.upper()), length):
+                keys.add(''.join(combo))
+        # Keep each IN list under SQLite's bound-parameter limit
+        keys = sorted(keys)
+        for i in range(0, len(keys), 500):
+            chunk = keys[i:i + 500]
+            placeholders = ','.join('?' for _ in chunk)
+            c = self.conn.execute(f'SELECT DISTINCT sorted_letters FROM anagrams WHERE sorted_letters IN ({placeholders})',
+                                  chunk)
+            for row in c:
+                yield row[0]
+
+    def words_from_rack(self, letters, min_length=1):
+        for key in self.rack_keys(letters):
+            if len(key) >= min_length:
+                yield from self.anagrams(key)
+
+    def completions(self, prefix=''):
+        prefix = prefix.upper()
+        c = self.conn.execute('SELECT word FROM anagrams WHERE word >= ? AND word < ? ORDER BY word',
+                              (prefix, prefix + '\x7f'))
+        for row in c:
+            yield row[0]
+
+class CountingLexicon:
+    """Wraps a Lexicon or SqliteLexicon, counting the queries made through it"""
+
+    QUERIES = ('is_word', 'is_prefix', 'step', 'is_final', 'words_from_rack', 'rack_keys')
+
+    def __init__(self, lexicon):
+        self.lexicon = lexicon
+        self.root = lexicon.root
+        self.counts = dict.fromkeys(self.QUERIES, 0)
+        for name in self.QUERIES:
+            setattr(self, name, self._counted(name, getattr(lexicon, name)))
+
+    def _counted(self, name, method):
+        counts = self.counts
+        def query(*args):
+            counts[name] += 1
+            return method(*args)
+        return query
+
+    def __getattr__(self, name):
+        return getattr(self.lexicon, name)
+
+def load_lexicon(lex_file=LEX_FILE, db_file=DB_FILE):
+    """Map the binary lexicon if it is usable, else build one from the database"""
+    if os.path.exists(lex_file):
+        try:
+            return Lexicon.load(lex_file)
+        except ValueError as e:
+            print(f"Ignoring {lex_file}: {e}", file=sys.stderr)
+    return Lexicon.from_db(db_file)
+
+def longest_words(lexicon, letters):
+    """(length, words) of the longest words letters can spell, walking the
+    rack index once; (0, []) if none"""
+    max_length = 0
+    longest_keys = []
+    for key in lexicon.rack_keys(letters):
+        if len(key) > max_length:
+            max_length = len(key)
+            longest_keys = [key]
+        elif len(key) == max_length:
+            longest_keys.append(key)
+    return max_length, sorted({word for key in longest_keys for word in lexicon.anagrams(key)})
+
+if __name__ == "__main__":
+    # Quick check from the command line: lexicon.py PREFIX
+    import time
+    start_time = time.time()
+    lex = load_lexicon()
+    print(f"Loaded {len(lex):,} words into {len(lex.final):,} nodes in {time.time() - start_time:.3f} seconds")
+    for prefix in sys.argv[1:]:
+        prefix = prefix.upper()
+        print(f"{prefix}: word={lex.is_word(prefix)} prefix={lex.is_prefix(prefix)}")
+        print('  ' + ' '.join(lex.completions(prefix)))
@@ -0,0 +1,95 @@
+#!/usr/bin/env python3
+# Load test for server.py: a number of concurrent connections send a mix of
+# requests over racks made from the benchmark word list, then report
+# requests per second and latency percentiles. --distinct bounds the racks
+# used, and so how often the server's cache is hit.
+import sys
+import json
+import time
+import random
+import asyncio
+import argparse
+from client import SOCKET_FILE, parse_address
+
+# Words the racks are made from
+WORDS_FILE = 'bench_words.txt'
+
+# Racks of one to three words, shuffled so the cache has to match on sorted letters
+def make_racks(count, seed):
+    rng = random.Random(seed)
+    with open(WORDS_FILE) as f:
+        words = [line.strip().upper() for line in f if line.strip().isalpha()]
+    racks = []
+    for _ in range(count):
+        letters = list(''.join(rng.choice(words) for _ in range(rng.randint(1, 3))))
+        rng.shuffle(letters)
+        racks.append(''.join(letters))
+    return racks
+
+# One connection sending its share of the requests, one at a time
+async def client(address, requests, latencies, errors):
+    tcp = parse_address(address)
+    if tcp is not None:
+        reader, writer = await asyncio.open_connection(*tcp)
+    else:
+        reader, writer = await asyncio.open_unix_connection(address)
+    try:
+        for request in requests:
+            start_time = time.perf_counter()
+            writer.write(json.dumps(request).encode() + b'\n')
+            await writer.drain()
+            reply = json.loads(await reader.readline())
+            latencies.append(time.perf_counter() - start_time)
+            if 'error' in reply:
+                errors.append(reply['error'])
+    finally:
+        writer.close()
+
+def percentile(sorted_values, fraction):
+    return sorted_values[min(len(sorted_values) - 1, int(fraction * len(sorted_values)))]
+
+async def run(args):
+    racks = make_racks(args.distinct, args.seed)
+    rng = random.Random(args.seed)
+    ops = args.ops.split(',')
+    requests = []
+    for _ in range(args.requests):
+        op = rng.choice(ops)
+        rack = rng.choice(racks)
+        if op == 'word':
+            requests.append({'op': 'word', 'word': rack})
+        elif op == 'solve':
+            requests.append({'op': 'solve', 'letters': rack, 'timeout': args.solve_timeout})
+        else:
+            requests.append({'op': op, 'letters': rack})
+    latencies = []
+    errors = []
+    start_time = time.perf_counter()
+    await asyncio.gather(*(client(args.address, requests[i::args.concurrency], latencies, errors)
+                           for i in range(args.concurrency)))
+    elapsed = time.perf_counter() - start_time
+    latencies.sort()
+    print(f"{len(latencies):,} requests ({args.ops}) over {args.concurrency} connections "
+          f"in {elapsed:.2f} seconds: {len(latencies) / elapsed:,.0f} requests/s")
+    print(f"latency p50 {percentile(latencies, 0.5) * 1e3:.2f} ms, p90 {percentile(latencies, 0.9) * 1e3:.2f} ms, "
+          f"p99 {percentile(latencies, 0.99) * 1e3:.2f} ms, max {latencies[-1] * 1e3:.2f} ms")
+    if errors:
+        print(f"{len(errors):,} errors, e.g. {errors[0]}", file=sys.stderr)
+
+def main():
+    parser = argparse.ArgumentParser(description='Measure the throughput and latency of server.py')
+    parser.add_argument('--address', default=SOCKET_FILE,
+                        help=f'socket path or HOST:PORT of the server (default {SOCKET_FILE})')
+    parser.add_argument('-n', '--requests', type=int, default=10000, help='requests to send (default 10000)')
+    parser.add_argument('-c', '--concurrency', type=int, default=16, help='connections at once (default 16)')
+    parser.add_argument('--ops', default='anagrams,longest,word',
+                        help='comma-separated ops to mix (anagrams, longest, word, solve)')
+    parser.add_argument('--distinct', type=int, default=1000, help='different racks to draw from (default 1000)')
+    parser.add_argument('--solve-timeout', type=float, default=5.0, metavar='SECONDS',
+                        help='time limit sent with solve requests (default 5)')
+    parser.add_argument('--seed', type=int, default=1)
+    args = parser.parse_args()
+    asyncio.run(run(args))
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,173 @@
+#!/usr/bin/env python3
+# Long-running lexicon server for the bananagram tools.
+# Keeps the lexicon (and the letter-count matrix, with NumPy) loaded and a
+# pool of solver processes warm, and answers requests over a Unix socket
+# (or localhost TCP with --port). The protocol is one JSON object per line
+# each way: a request names an op and its arguments,
+#   {"op": "anagrams", "letters": "STOP"}
+# and gets back {"result": ...} or {"error": "..."}. Ops:
+#   anagrams  letters -> words spelled with exactly those letters
+#   longest   letters -> {"length": n, "words": [...]}, longest words they spell
+#   word      word    -> true if it is a word
+#   solve     letters, timeout -> {"grid": rows or null, "timed_out": bool}
+# Answers are kept in an LRU cache keyed by the op and the rack's sorted
+# letters, so the same rack in any order is only worked out once; identical
+# requests that arrive while the first is still running wait for it.
+# client.py has the blocking client the scripts use for --server.
+import os
+import sys
+import json
+import time
+import signal
+import asyncio
+import argparse
+import concurrent.futures
+from collections import OrderedDict
+import bananagram
+from lexicon import load_lexicon, longest_words
+from client import SOCKET_FILE, ServerError
+
+try:
+    from letter_counts import LetterCounts
+except ImportError:
+    LetterCounts = None  # No NumPy: walk the lexicon's rack index instead
+
+DB_FILE = 'words.db'
+LEX_FILE = 'words.lex'
+# Answers kept in the LRU cache
+CACHE_SIZE = 4096
+# Seconds a solve may take unless the request says otherwise
+SOLVE_TIMEOUT = 30.0
+
+# Solve in a pool process: the lexicon was loaded before the pool forked
+def solve_rack(letters, timeout):
+    start_time = time.time()
+    grid = bananagram.serial_solve(letters, timeout=timeout)
+    return {
+        'grid': [''.join(row) for row in grid] if grid else None,
+        'timed_out': grid is None and time.time() - start_time >= timeout,
+    }
+
+class LexiconServer:
+    def __init__(self, lexicon, workers=None, cache_size=CACHE_SIZE):
+        self.lexicon = lexicon
+        self.matrix = LetterCounts.load(lexicon) if LetterCounts is not None else None
+        bananagram.lexicon = lexicon  # Inherited by the solver processes
+        self.pool = concurrent.futures.ProcessPoolExecutor(workers)
+        self.cache = OrderedDict()  # key -> asyncio future of the answer
+        self.cache_size = cache_size
+        self.requests = 0
+        self.hits = 0
+
+    def longest(self, letters):
+        if self.matrix is not None:
+            length, words = self.matrix.longest(letters)
+        else:
+            length, words = longest_words(self.lexicon, letters)
+        return {'length': length, 'words': sorted(words)}
+
+    # Work out an answer; solves go to the process pool, the rest are quick
+    # enough to answer on the event loop
+    async def compute(self, op, letters, timeout):
+        if op == 'anagrams':
+            return self.lexicon.anagrams(letters)
+        if op == 'longest':
+            return self.longest(letters)
+        if op == 'word':
+            return self.lexicon.is_word(letters)
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(self.pool, solve_rack, letters, timeout)
+
+    async def handle(self, request):
+        op = request.get('op')
+        if op not in ('anagrams', 'longest', 'word', 'solve'):
+            raise ServerError(f"unknown op: {op!r}")
+        letters = str(request.get('word' if op == 'word' else 'letters', '')).upper()
+        if not (letters.isascii() and letters.isalpha()):
+            raise ServerError('letters must be A-Z')
+        timeout = float(request.get('timeout', SOLVE_TIMEOUT))
+        # A word is checked as spelled; for the rest any order of the rack will do
+        key = (op, letters if op == 'word' else ''.join(sorted(letters)), timeout if op == 'solve' else None)
+        self.requests += 1
+        future = self.cache.get(key)
+        if future is not None:
+            self.hits += 1
+            self.cache.move_to_end(key)
+        else:
+            future = asyncio.ensure_future(self.compute(op, letters, timeout))
+            self.cache[key] = future
+            if len(self.cache) > self.cache_size:
+                self.cache.popitem(last=False)
+        try:
+            result = await future
+        except Exception:
+            self.cache.pop(key, None)
+            raise
+        # A timed-out solve might succeed another time; don't remember it
+        if op == 'solve' and result['timed_out']:
+            self.cache.pop(key, None)
+        return result
+
+    async def serve_client(self, reader, writer):
+        try:
+            while True:
+                line = await reader.readline()
+                if not line:
+                    break
+                try:
+                    request = json.loads(line)
+                    if not isinstance(request, dict):
+                        raise ServerError('request must be a JSON object')
+                    reply = {'result': await self.handle(request)}
+                except (ServerError, ValueError, TypeError) as e:
+                    reply = {'error': str(e)}
+                except Exception as e:
+                    # Anything else (a worker dying, say) is the server's
+                    # fault, but the client still gets an answer
+                    print(f"Request failed: {e!r}", file=sys.stderr)
+                    reply = {'error': f"server error: {e!r}"}
+                writer.write(json.dumps(reply).encode() + b'\n')
+                await writer.drain()
+        except ConnectionError:
+            pass
+        finally:
+            writer.close()
+
+    async def run(self, socket_path=SOCKET_FILE, port=None):
+        if port is not None:
+            server = await asyncio.start_server(self.serve_client, '127.0.0.1', port)
+            where = f"127.0.0.1:{port}"
+        else:
+            if os.path.exists(socket_path):
+                os.remove(socket_path)  # Left behind by a server that didn't shut down cleanly
+            server = await asyncio.start_unix_server(self.serve_client, socket_path)
+            where = socket_path
+        print(f"Serving {len(self.lexicon):,} words on {where}", file=sys.stderr)
+        # Run until interrupted (Ctrl-C) or told to stop (SIGTERM)
+        stop = asyncio.Event()
+        asyncio.get_running_loop().add_signal_handler(signal.SIGTERM, stop.set)
+        try:
+            async with server:
+                await stop.wait()
+        finally:
+            if port is None and os.path.exists(socket_path):
+                os.remove(socket_path)
+            self.pool.shutdown(cancel_futures=True)
+            print(f"{self.requests:,} requests, {self.hits:,} answered from the cache", file=sys.stderr)
+
+def main():
+    parser = argparse.ArgumentParser(description='Serve lexicon lookups and solves to the bananagram tools')
+    parser.add_argument('--socket', default=SOCKET_FILE, help=f'Unix socket to listen on (default {SOCKET_FILE})')
+    parser.add_argument('--port', type=int, help='listen on 127.0.0.1:PORT instead of a Unix socket')
+    parser.add_argument('--workers', type=int, help='solver processes (default: one per core)')
+    parser.add_argument('--cache-size', type=int, default=CACHE_SIZE, metavar='N',
+                        help=f'answers kept in the LRU cache (default {CACHE_SIZE})')
+    args = parser.parse_args()
+    server = LexiconServer(load_lexicon(LEX_FILE, DB_FILE), args.workers, args.cache_size)
+    try:
+        asyncio.run(server.run(args.socket, args.port))
+    except KeyboardInterrupt:
+        pass
+
+if __name__ == "__main__":
+    main()
@@ -1,52 +1,130 @@
 #!/usr/bin/env python3
+import os
+import json
+import heapq
 import sqlite3
+import argparse
 from collections import Counter
-import matplotlib.pyplot as plt
+
+try:
+    import numpy as np
+except ImportError:
+    np = None  # Count letters per row in Python instead
 
 DB_FILE = 'words.db'
 
+# Rows fetched from the scan at a time
+CHUNK_SIZE = 10000
+# How many anagram groups and longest words to report
+TOP = 10
+
+# Add one chunk of (sorted_letters, count) groups to the running totals
+def add_groups(totals, rows):
+    if np is None:
+        for sorted_letters, count in rows:
+            totals['lengths'][len(sorted_letters)] += count
+            for letter in sorted_letters:
+                totals['letters'][letter] += count
+        return
+    keys = [row[0] for row in rows]
+    counts = np.array([row[1] for row in rows], dtype=np.int64)
+    lengths = np.array([len(key) for key in keys], dtype=np.int64)
+    # Each key's letters occur once in every word of its group
+    codes = np.frombuffer(''.join(keys).encode('ascii'), dtype=np.uint8) - 65
+    letters = np.bincount(codes, weights=np.repeat(counts, lengths), minlength=26)
+    for code in np.flatnonzero(letters):
+        totals['letters'][chr(65 + code)] += int(letters[code])
+    by_length = np.bincount(lengths, weights=counts)
+    for length in np.flatnonzero(by_length):
+        totals['lengths'][int(length)] += int(by_length[length])
+
+# The statistics come from one pass over the anagram groups, which SQLite
+# streams from the sorted_letters index: every word in a group has the
+# group's length and letters, so the word count, length distribution,
+# average length, letter frequency and largest groups follow from
+# (sorted_letters, count) rows alone. The rows are read in chunks and only
+# running totals and the top groups are kept, so memory does not grow with
+# the word list. The length distribution then says how long the longest
+# words are, so fetching them only looks at words that long.
 def get_database_stats():
     conn = sqlite3.connect(DB_FILE)
     c = conn.cursor()
-    
-    # Get total word count
-    c.execute('SELECT COUNT(*) FROM anagrams')
-    total_words = c.fetchone()[0]
-    
-    # Get word length distribution
-    c.execute('SELECT LENGTH(word) as word_length, COUNT(*) as count FROM anagrams GROUP BY LENGTH(word) ORDER BY word_length')
-    length_dist = dict(c.fetchall())
-    
-    # Get average word length
-    c.execute('SELECT AVG(LENGTH(word)) FROM anagrams')
-    avg_length = c.fetchone()[0]
-    
-    # Get sorted_letters frequency (most common anagram groups)
-    c.execute('SELECT sorted_letters, COUNT(*) as count FROM anagrams GROUP BY sorted_letters ORDER BY count DESC LIMIT 10')
-    common_anagrams = c.fetchall()
-    
-    # Get words by length
-    c.execute('SELECT word FROM anagrams ORDER BY LENGTH(word) DESC LIMIT 10')
+
+    totals = {'lengths': Counter(), 'letters': Counter()}
+    # Heap of the TOP largest groups as (count, -row, sorted_letters); keys
+    # arrive in order, so on equal counts the later key is dropped first
+    largest = []
+    row_number = 0
+    c.execute('SELECT sorted_letters, COUNT(*) FROM anagrams GROUP BY sorted_letters')
+    while True:
+        rows = c.fetchmany(CHUNK_SIZE)
+        if not rows:
+            break
+        add_groups(totals, rows)
+        for sorted_letters, count in rows:
+            row_number += 1
+            if len(largest) < TOP:
+                heapq.heappush(largest, (count, -row_number, sorted_letters))
+            elif count > largest[0][0]:
+                heapq.heapreplace(largest, (count, -row_number, sorted_letters))
+
+    length_dist = dict(sorted(totals['lengths'].items()))
+    total_words = sum(length_dist.values())
+    avg_length = sum(length * count for length, count in length_dist.items()) / total_words if total_words else 0.0
+    common_anagrams = [(key, count) for count, _, key in sorted(largest, key=lambda g: (-g[0], g[2]))]
+
+    # Shortest length among the TOP longest words
+    min_length = 0
+    longer = 0
+    for length in sorted(length_dist, reverse=True):
+        longer += length_dist[length]
+        min_length = length
+        if longer >= TOP:
+            break
+    c.execute(f'SELECT word FROM anagrams WHERE LENGTH(word) >= ? ORDER BY LENGTH(word) DESC, word LIMIT {TOP}',
+              (min_length,))
     longest_words = [row[0] for row in c.fetchall()]
-    
-    # Get letter frequency
-    c.execute('SELECT word FROM anagrams')
-    all_words = [row[0] for row in c.fetchall()]
-    letter_freq = Counter()
-    for word in all_words:
-        letter_freq.update(word)
-    
+
     conn.close()
-    
+
     return {
         'total_words': total_words,
         'length_distribution': length_dist,
         'average_length': avg_length,
         'common_anagrams': common_anagrams,
         'longest_words': longest_words,
-        'letter_frequency': letter_freq
+        'letter_frequency': totals['letters']
     }
 
+# Statistics saved next to the database, valid while the database is unchanged
+def cache_file():
+    return DB_FILE + '.stats.json'
+
+def db_signature():
+    info = os.stat(DB_FILE)
+    return [info.st_mtime_ns, info.st_size]
+
+def load_cached_stats():
+    try:
+        with open(cache_file()) as f:
+            cached = json.load(f)
+    except (OSError, ValueError):
+        return None
+    if cached.get('db') != db_signature():
+        return None
+    stats = cached['stats']
+    # JSON turns int keys into strings and tuples into lists
+    stats['length_distribution'] = {int(k): v for k, v in stats['length_distribution'].items()}
+    stats['common_anagrams'] = [tuple(group) for group in stats['common_anagrams']]
+    stats['letter_frequency'] = Counter(stats['letter_frequency'])
+    return stats
+
+def save_cached_stats(stats):
+    tmp = cache_file() + '.tmp'
+    with open(tmp, 'w') as f:
+        json.dump({'db': db_signature(), 'stats': stats}, f)
+    os.replace(tmp, cache_file())
+
 def print_stats(stats):
     print("=== WORD DATABASE STATISTICS ===\n")
     
@@ -74,6 +152,7 @@ def print_stats(stats):
 
 def plot_stats(stats):
     """Create visualizations of the statistics"""
+    import matplotlib.pyplot as plt
     fig, ((ax1, ax2), (ax3, ax4)) = plt.subplots(2, 2, figsize=(15, 10))
     
     # Word length distribution
@@ -117,8 +196,19 @@ def plot_stats(stats):
     print("\nStatistics plot saved as 'word_stats.png'")
 
 def main():
-    print("Analyzing word database...")
-    stats = get_database_stats()
+    parser = argparse.ArgumentParser(description='Statistics of the word database')
+    parser.add_argument('--cache', action='store_true',
+                        help=f'reuse the statistics saved in {cache_file()} while {DB_FILE} is unchanged')
+    args = parser.parse_args()
+
+    stats = load_cached_stats() if args.cache else None
+    if stats is None:
+        print("Analyzing word database...")
+        stats = get_database_stats()
+        if args.cache:
+            save_cached_stats(stats)
+    else:
+        print(f"Using cached statistics from {cache_file()}")
     print_stats(stats)
     
     try:
@@ -1,22 +1,11 @@
 #!/usr/bin/env python3
-# From https://github.com/Hundemeier/sacn
-import sacn
+# Turn every pixel of the matrix off.
 import time
+from framebuffer import MatrixFramebuffer
 
-sender = sacn.sACNsender()  # provide an IP-Address to bind to if you are using Windows and want to use multicast
-sender.start()  # start the sending thread
-for univ in range(1, 72):
-	sender.activate_output(univ)  # start sending out data in the 1st universe
-	# sender[univ].multicast = False  # set multicast to True
-	sender[univ].destination = "fpp"  # or provide unicast information.
-	# Keep in mind that if multicast is on, unicast is not used
-	# sender[univ].dmx_data = (0, 255, 0, 255, 0, 0, 255, 255, 255)  # some test DMX data
-	row = []
-	for i in range(0, 512, 3):
-		row.append(  0)
-		row.append(  0)
-		row.append(  0)
-	sender[univ].dmx_data = row
+fb = MatrixFramebuffer()	# Sends to the layout's hosts
+fb.back.fill(0)	# Every channel off
+fb.show()	# The first show sends every universe
 
-time.sleep(0.1)  # send the data for 10 seconds
-sender.stop()  # do not forget to stop the sender
+time.sleep(0.1)
+fb.close()
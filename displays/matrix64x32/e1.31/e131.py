@@ -0,0 +1,195 @@
+#!/usr/bin/env python3
+# E1.31 (sACN) sender for the matrix, without the sacn package's thread.
+# Every universe's data packet is built once, in one bytearray; sending a
+# frame copies the new DMX slots and sequence numbers into place (one NumPy
+# copy for all of them) and sends the universes in one burst, with a single
+# sendmmsg() call where Linux has it and a tight send() loop otherwise.
+# With a sync universe the data packets ask the receiver to hold them until
+# the sync packet that ends each burst, so a frame never shows half-drawn.
+# Run it to measure packets per second: ./e131.py [host] [seconds]
+# (receiver.py on the same machine is a stand-in for FPP)
+import sys
+import time
+import uuid
+import errno
+import ctypes
+import socket
+import numpy as np
+
+port = 5568	# E1.31 UDP port
+channels = 510	# number of channels per universe
+maxUniv = 74	# Total numbers of universes
+
+# Packet layout (ANSI E1.31-2016): root layer, framing layer, DMP layer
+dataHeader = 126	# Bytes before the first DMX slot
+seqOffset = 111		# Sequence number in a data packet
+syncSeqOffset = 44	# Sequence number in a sync packet
+acnId = b'ASC-E1.17\0\0\0'
+
+def flagsLength(length):
+    return (0x7000 | length).to_bytes(2, 'big')
+
+# Data packet for one universe with every slot 0
+def dataPacket(universe, cid, sourceName, priority, syncUniverse, slots=channels):
+    length = dataHeader + slots
+    packet = bytearray(length)
+    packet[0:16] = b'\x00\x10\x00\x00' + acnId
+    packet[16:18] = flagsLength(length - 16)
+    packet[18:22] = (4).to_bytes(4, 'big')	# VECTOR_ROOT_E131_DATA
+    packet[22:38] = cid
+    packet[38:40] = flagsLength(length - 38)
+    packet[40:44] = (2).to_bytes(4, 'big')	# VECTOR_E131_DATA_PACKET
+    packet[44:108] = sourceName.encode()[:63].ljust(64, b'\0')
+    packet[108] = priority
+    packet[109:111] = syncUniverse.to_bytes(2, 'big')
+    packet[113:115] = universe.to_bytes(2, 'big')
+    packet[115:117] = flagsLength(length - 115)
+    packet[117] = 0x02	# VECTOR_DMP_SET_PROPERTY
+    packet[118] = 0xa1	# Address and data type
+    packet[121:123] = (1).to_bytes(2, 'big')	# Address increment
+    packet[123:125] = (slots + 1).to_bytes(2, 'big')	# Start code and slots
+    return packet
+
+# Universe synchronization packet
+def syncPacket(syncUniverse, cid):
+    packet = bytearray(49)
+    packet[0:16] = b'\x00\x10\x00\x00' + acnId
+    packet[16:18] = flagsLength(49 - 16)
+    packet[18:22] = (8).to_bytes(4, 'big')	# VECTOR_ROOT_E131_EXTENDED
+    packet[22:38] = cid
+    packet[38:40] = flagsLength(49 - 38)
+    packet[40:44] = (1).to_bytes(4, 'big')	# VECTOR_E131_EXTENDED_SYNCHRONIZATION
+    packet[45:47] = syncUniverse.to_bytes(2, 'big')
+    return packet
+
+# sendmmsg() through ctypes: Python's socket module doesn't wrap it
+class iovec(ctypes.Structure):
+    _fields_ = [('iov_base', ctypes.c_void_p), ('iov_len', ctypes.c_size_t)]
+
+class msghdr(ctypes.Structure):
+    _fields_ = [('msg_name', ctypes.c_void_p), ('msg_namelen', ctypes.c_uint32),
+                ('msg_iov', ctypes.POINTER(iovec)), ('msg_iovlen', ctypes.c_size_t),
+                ('msg_control', ctypes.c_void_p), ('msg_controllen', ctypes.c_size_t),
+                ('msg_flags', ctypes.c_int)]
+
+class mmsghdr(ctypes.Structure):
+    _fields_ = [('msg_hdr', msghdr), ('msg_len', ctypes.c_uint)]
+
+try:
+    libc = ctypes.CDLL(None, use_errno=True)
+    sendmmsg = libc.sendmmsg
+    sendmmsg.argtypes = [ctypes.c_int, ctypes.c_void_p, ctypes.c_uint, ctypes.c_int]
+except (OSError, AttributeError):
+    sendmmsg = None	# Not Linux: send one packet at a time
+
+class E131Sender:
+    # universes: the universe numbers to send, one per row of the frames
+    # passed to send(). sync: universe to send sync packets on, or None.
+    # channels: DMX slots per universe.
+    def __init__(self, destination="fpp", universes=None, sync=None, sourceName="matrix64x32",
+                 priority=100, useSendmmsg=True, channels=channels):
+        self.universes = list(range(1, maxUniv)) if universes is None else list(universes)
+        self.sync = sync
+        cid = uuid.uuid4().bytes
+        count = len(self.universes)
+        self.packetLength = dataHeader + channels
+        self.buffer = bytearray(count * self.packetLength)
+        for row, univ in enumerate(self.universes):
+            start = row * self.packetLength
+            self.buffer[start:start + self.packetLength] = dataPacket(univ, cid, sourceName, priority, sync or 0, channels)
+        self.packets = np.frombuffer(self.buffer, dtype=np.uint8).reshape(count, self.packetLength)
+        self.slots = self.packets[:, dataHeader:]	# Where send() copies each frame
+        self.sequence = np.zeros(count, dtype=np.uint8)
+        self.syncBuffer = syncPacket(sync, cid) if sync else None
+        self.sent = 0	# Packets sent
+        self.sock = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+        self.sock.setsockopt(socket.SOL_SOCKET, socket.SO_SNDBUF, 4 * len(self.buffer))
+        self.sock.connect((destination, port))	# No address needed per packet
+        self.views = [memoryview(self.buffer)[row * self.packetLength:(row + 1) * self.packetLength]
+                      for row in range(count)]
+        self.msgs = None
+        if useSendmmsg and sendmmsg is not None:
+            # One iovec and message header per universe, pointing into buffer
+            base = ctypes.addressof((ctypes.c_char * len(self.buffer)).from_buffer(self.buffer))
+            self.iovecs = (iovec * count)(*[iovec(base + row * self.packetLength, self.packetLength)
+                                            for row in range(count)])
+            self.msgs = (mmsghdr * count)()
+            for row in range(count):
+                self.msgs[row].msg_hdr.msg_iov = ctypes.pointer(self.iovecs[row])
+                self.msgs[row].msg_hdr.msg_iovlen = 1
+
+    # Send the given rows (all if None) of frame, a universes x channels
+    # array, then the sync packet if there is one
+    def send(self, frame, rows=None):
+        if rows is None:
+            self.slots[:] = frame
+            self.sequence += 1
+            self.packets[:, seqOffset] = self.sequence
+            rows = range(len(self.universes))
+        else:
+            rows = np.asarray(rows)
+            self.slots[rows] = frame[rows]
+            self.sequence[rows] += 1
+            self.packets[rows, seqOffset] = self.sequence[rows]
+        if self.msgs is not None:
+            self.sendBurst(rows)
+        else:
+            for row in rows:
+                self.sendOne(self.views[row])
+        self.sent += len(rows)
+        if self.syncBuffer is not None:
+            self.syncBuffer[syncSeqOffset] = (self.syncBuffer[syncSeqOffset] + 1) % 256
+            self.sendOne(self.syncBuffer)
+            self.sent += 1
+
+    def sendBurst(self, rows):
+        if len(rows) == len(self.universes):
+            msgs = self.msgs
+        else:
+            msgs = (mmsghdr * len(rows))(*[self.msgs[row] for row in rows])
+        done = 0
+        while done < len(msgs):
+            n = sendmmsg(self.sock.fileno(), ctypes.addressof(msgs) + done * ctypes.sizeof(mmsghdr),
+                         len(msgs) - done, 0)
+            if n < 0:
+                err = ctypes.get_errno()
+                # No one listening yet (an ICMP reply to an earlier packet): carry on
+                if err in (errno.ECONNREFUSED, errno.EINTR):
+                    continue
+                if err in (errno.EAGAIN, errno.ENOBUFS):
+                    time.sleep(0.0005)	# Send buffer full
+                    continue
+                raise OSError(err, "sendmmsg: " + errno.errorcode.get(err, str(err)))
+            done += n
+
+    def sendOne(self, packet):
+        while True:
+            try:
+                self.sock.send(packet)
+                return
+            except ConnectionRefusedError:
+                pass	# No one listening yet; the error belongs to an earlier packet
+            except (BlockingIOError, InterruptedError):
+                time.sleep(0.0005)
+
+    def close(self):
+        self.sock.close()
+
+if __name__ == "__main__":
+    host = sys.argv[1] if len(sys.argv) >= 2 else "127.0.0.1"
+    seconds = float(sys.argv[2]) if len(sys.argv) >= 3 else 2.0
+    frame = np.random.randint(0, 256, (maxUniv - 1, channels), dtype=np.uint8)
+    for name, useSendmmsg in (("sendmmsg", True), ("send loop", False)):
+        if useSendmmsg and sendmmsg is None:
+            print("sendmmsg: not available here")
+            continue
+        sender = E131Sender(host, sync=maxUniv, useSendmmsg=useSendmmsg)
+        frames = 0
+        start = time.perf_counter()
+        while time.perf_counter() - start < seconds:
+            sender.send(frame)
+            frames += 1
+        elapsed = time.perf_counter() - start
+        print("%-10s %8.0f packets/s, %6.0f frames/s of %d universes to %s" % (
+            name + ":", sender.sent / elapsed, frames / elapsed, len(sender.universes), host))
+        sender.close()
@@ -0,0 +1,112 @@
+#!/usr/bin/env python3
+# Double-buffered frame for the E1.31 matrix scripts.
+# The front buffer (what was last sent) and the back buffer (what is being
+# drawn) are the two halves of one bytearray, seen as universes x channels
+# NumPy arrays. show() compares them universe by universe and sends only the
+# universes that changed, so a sprite or a line of scrolling text costs a
+# few packets a frame instead of all 73. Universes that haven't been sent
+# for keepAlive seconds are sent again anyway, so the receiver doesn't time
+# them out (E1.31 receivers drop a source after 2.5 seconds of silence).
+# The rows of the buffers are the universes of the display's layout (see
+# layout.py), which go out through a LayoutSender, one e131.E131Sender per
+# controller, unless another sender is passed in, such as a SacnSender to
+# use the sacn package instead.
+import time
+import numpy as np
+from e131 import E131Sender
+from layout import loadLayout
+
+maxUniv = 74	# Total numbers of universes
+keepAlive = 1.0	# Seconds between refreshes of a universe that hasn't changed
+
+# Sends frames through the sacn package's sender, like the scripts used to
+class SacnSender:
+    def __init__(self, destination="fpp", universes=None):
+        import sacn
+        self.universes = list(range(1, maxUniv)) if universes is None else list(universes)
+        self.sender = sacn.sACNsender()
+        self.sender.start()
+        for univ in self.universes:
+            self.sender.activate_output(univ)
+            self.sender[univ].destination = destination
+        self.sender.manual_flush = True	# Only send when told to
+
+    def send(self, frame, rows=None):
+        rows = range(len(self.universes)) if rows is None else rows
+        for row in rows:
+            self.sender[self.universes[row]].dmx_data = tuple(frame[row].tolist())
+        self.sender.flush([self.universes[row] for row in rows])
+
+    def close(self):
+        self.sender.stop()
+
+# Sends each host's rows of a layout's frames to that host
+class LayoutSender:
+    # destination: send every host's universes there instead, e.g. to
+    # receiver.py for testing
+    def __init__(self, layout, sync=None, destination=None):
+        self.senders = []	# (first row, row after its last, E131Sender) per host
+        for host, (first, stop) in layout.hosts.items():
+            universes = [univ for other, univ in layout.universes[first:stop]]
+            sender = E131Sender(destination or host, universes, sync, channels=layout.channels)
+            self.senders.append((first, stop, sender))
+
+    def send(self, frame, rows=None):
+        for first, stop, sender in self.senders:
+            if rows is None:
+                sender.send(frame[first:stop])
+            else:
+                mine = rows[(rows >= first) & (rows < stop)] - first
+                if len(mine):
+                    sender.send(frame[first:stop], mine)
+
+    def close(self):
+        for first, stop, sender in self.senders:
+            sender.close()
+
+class MatrixFramebuffer:
+    # sync: universe for E1.31 sync packets from the default sender, or None.
+    # destination: where the default sender sends instead of the layout's hosts
+    def __init__(self, sender=None, destination=None, keepAlive=keepAlive, sync=None, layout=None):
+        layout = loadLayout() if layout is None else layout
+        rows = len(layout.universes)
+        # Universes sent: all the rows but the layout's spare one, which is last
+        self.universes = sum(host is not None for host, univ in layout.universes)
+        self.keepAlive = keepAlive
+        self.buffer = bytearray(2 * rows * layout.channels)
+        both = np.frombuffer(self.buffer, dtype=np.uint8).reshape(2, rows, layout.channels)
+        self.front = both[0]	# Last sent
+        self.back = both[1]	# Draw here
+        self.lastSent = np.full(self.universes, -np.inf)	# When each universe was last sent
+        self.frames = 0
+        self.packets = 0
+        self.ownSender = sender is None
+        if sender is None:
+            sender = LayoutSender(layout, sync, destination)
+        self.sender = sender
+
+    # Send the universes of the back buffer that differ from the front
+    # buffer, or are due a keep-alive refresh. Returns how many were sent.
+    def show(self):
+        now = time.monotonic()
+        sent = self.universes
+        dirty = (self.front[:sent] != self.back[:sent]).any(axis=1)
+        dirty |= now - self.lastSent >= self.keepAlive
+        changed = np.flatnonzero(dirty)
+        if len(changed):
+            self.sender.send(self.back, changed)
+        self.front[changed] = self.back[changed]
+        self.lastSent[changed] = now
+        self.frames += 1
+        self.packets += len(changed)
+        return len(changed)
+
+    # Packets sent against what sending every universe every frame would take
+    def stats(self):
+        full = self.frames * self.universes
+        return "%d frames, %d packets (%.1f%% of %d)" % (
+            self.frames, self.packets, 100 * self.packets / full if full else 0, full)
+
+    def close(self):
+        if self.ownSender:
+            self.sender.close()
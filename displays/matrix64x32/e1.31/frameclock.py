@@ -0,0 +1,74 @@
+#!/usr/bin/env python3
+# Frame clock for the E1.31 animations.
+# Frames are due at absolute times, start + n / fps on the monotonic clock,
+# so the time spent drawing and sending a frame comes out of the wait for the
+# next one instead of adding to it, and small delays don't accumulate.
+# When a frame overruns by whole frame periods those frames are dropped (the
+# animation jumps ahead to where it should be), or with drop=False the clock
+# starts counting again from the late frame (the animation slows down).
+#   clock = FrameClock(30)
+#   for frame in clock.frames(100):
+#       ...draw frame number frame and fb.show()...
+#   print(clock.report())
+import time
+
+class FrameClock:
+    def __init__(self, fps, drop=True):
+        self.fps = fps
+        self.period = 1.0 / fps
+        self.drop = drop
+        self.computeTimes = []	# Seconds from each frame's start to the end of its work
+        self.jitters = []	# Seconds each frame started after it was due
+        self.missed = 0		# Frames whose work ran past the next frame's deadline
+        self.dropped = 0	# Frame numbers skipped to catch up
+        self.elapsed = 0.0
+        self.span = 0.0		# Seconds from the first frame's start to the last's
+
+    # Yield frame numbers from 0 (forever if count is None), each when it's due
+    def frames(self, count=None):
+        start = deadline = time.monotonic()
+        frame = 0
+        first = None
+        while count is None or frame < count:
+            wake = time.monotonic()
+            first = wake if first is None else first
+            self.span = wake - first
+            self.jitters.append(wake - deadline)
+            yield frame
+            done = time.monotonic()
+            self.computeTimes.append(done - wake)
+            self.elapsed = done - start
+            frame += 1
+            deadline += self.period
+            if done > deadline:
+                self.missed += 1
+                late = int((done - deadline) / self.period)	# Whole frames behind
+                if self.drop:
+                    frame += late
+                    deadline += late * self.period
+                    self.dropped += late
+                else:
+                    deadline = done
+            wait = deadline - time.monotonic()
+            if wait > 0:
+                time.sleep(wait)
+
+    # fps counts frame starts: n frames span n - 1 periods
+    def report(self):
+        shown = len(self.computeTimes)
+        if not shown:
+            return "no frames"
+        fps = (shown - 1) / self.span if self.span else 0
+        ms = lambda values: (1000 * sum(values) / len(values), 1000 * max(values))
+        return ("%d frames in %.2f s: %.1f fps (target %g), compute %.2f ms mean %.2f ms max, "
+                "jitter %.2f ms mean %.2f ms max, %d missed deadlines, %d frames dropped" % (
+                    (shown, self.elapsed, fps, self.fps)
+                    + ms(self.computeTimes) + ms(self.jitters) + (self.missed, self.dropped)))
+
+if __name__ == "__main__":
+    # Show how the clock holds its rate with a varying amount of work per frame
+    import random
+    clock = FrameClock(60)
+    for frame in clock.frames(120):
+        time.sleep(random.uniform(0.002, 0.02))
+    print(clock.report())
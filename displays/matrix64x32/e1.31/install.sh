@@ -1,8 +1,17 @@
 # From https://github.com/Hundemeier/sacn
 sudo pip install sacn
 
+# NumPy for packer.py, framebuffer.py and e131.py
+sudo pip install numpy
+
+# Only needed for YAML layout files (layout.py)
+sudo pip install pyyaml
+
 # https://www.npmjs.com/package/e131
 npm install e131
 
 # This is need to resize images
 sudo apt install imagemagick
+
+# Decodes video for play.py
+sudo apt install ffmpeg
@@ -0,0 +1,144 @@
+#!/usr/bin/env python3
+# How the pixels of the display are wired to E1.31 universes.
+# A layout file (JSON, or YAML with PyYAML installed) lists the panels that
+# make up the display and where each one gets its data:
+#   {"channels": 510,
+#    "panels": [
+#      {"host": "fpp", "universe": 1, "x": 0, "y": 0, "width": 192, "height": 64},
+#      {"host": "10.0.0.12", "universe": 1, "x": 0, "y": 64, "width": 64, "height": 32,
+#       "rotate": 180, "serpentine": true}]}
+# Each panel is width x height pixels as wired, before it is turned: its first
+# pixel is the top left one (the top right one with "flip"), its pixels run
+# along the rows, and with "serpentine" every other row runs back the other
+# way. "rotate" turns it clockwise by 90, 180 or 270 degrees, with its top
+# left corner then at column x, row y of the display. Its red, green and blue
+# channels start at channel "channel" (default 1) of "universe" on "host",
+# and carry on through the following universes; without a universe a panel
+# starts where the previous panel on the same host ended. The display is
+# "width" x "height" pixels (default: just big enough for the panels), and
+# channels is the number of channels per universe.
+# Layout() compiles this once into an index array, the same shape as the
+# images drawn on the display: index[row, col, k] is where channel k of that
+# pixel goes in a frame of len(universes) x channels bytes, one row per
+# universe, grouped by host. Packing an image is then one fancy indexing
+# assignment however many panels and controllers there are. Pixels that no
+# panel covers go to a spare row at the end of the frame that is never sent.
+# Run it to check a layout: ./layout.py [layout.json]
+import os
+import sys
+import json
+import numpy as np
+try:
+    import yaml
+except ImportError:
+    yaml = None	# Only JSON layouts
+
+channels = 510	# number of channels per universe
+host = "fpp"	# Where panels without a host are sent
+layoutFile = os.path.join(os.path.dirname(os.path.abspath(__file__)), "layout.json")
+
+# The single 192x64 matrix on fpp, for when there's no layout file
+matrix = {"channels": channels, "panels": [{"host": host, "universe": 1, "width": 192, "height": 64}]}
+
+class Layout:
+    def __init__(self, description=matrix):
+        self.channels = description.get('channels', channels)
+        panels = description.get('panels', [])
+        if not panels:
+            raise ValueError("layout has no panels")
+        # Wiring order of each panel's pixels as they sit on the display
+        placed = []
+        for n, panel in enumerate(panels):
+            order = np.arange(panel['height'] * panel['width']).reshape(panel['height'], panel['width'])
+            if panel.get('flip'):
+                order = order[:, ::-1]
+            if panel.get('serpentine'):
+                order[1::2] = order[1::2, ::-1].copy()
+            rotate = panel.get('rotate', 0)
+            if rotate % 90:
+                raise ValueError("panel %d: rotate must be 0, 90, 180 or 270" % n)
+            placed.append(np.rot90(order, -(rotate // 90) % 4))
+        self.cols = description.get('width', max(p.get('x', 0) + o.shape[1] for p, o in zip(panels, placed)))
+        self.rows = description.get('height', max(p.get('y', 0) + o.shape[0] for p, o in zip(panels, placed)))
+
+        # First channel of each panel, counting channels from the start of
+        # universe 1 of its host
+        starts = []
+        ends = {}	# Host -> channel after the last panel so far
+        for panel in panels:
+            name = panel.get('host', description.get('host', host))
+            if 'universe' in panel:
+                start = (panel['universe'] - 1) * self.channels + panel.get('channel', 1) - 1
+            else:
+                start = ends.get(name, 0)
+            starts.append((name, start))
+            ends[name] = start + 3 * panel['width'] * panel['height']
+
+        # Frame rows: the universes each host uses, in order, host by host
+        self.universes = []	# (host, universe) for each row of the frame
+        self.hosts = {}		# Host -> (first row, row after its last)
+        rowOf = {}		# Host -> array of frame row by universe - 1
+        for name in dict.fromkeys(name for name, start in starts):
+            used = set()
+            for (other, start), panel in zip(starts, panels):
+                if other == name:
+                    end = start + 3 * panel['width'] * panel['height']
+                    used.update(range(start // self.channels, (end - 1) // self.channels + 1))
+            first = len(self.universes)
+            rowOf[name] = np.zeros(max(used) + 1, dtype=np.intp)
+            for univ in sorted(used):
+                rowOf[name][univ] = len(self.universes)
+                self.universes.append((name, univ + 1))
+            self.hosts[name] = (first, len(self.universes))
+
+        # Where each pixel's channels go in the frame
+        covered = np.zeros((self.rows, self.cols), dtype=np.intp)
+        self.index = np.zeros((self.rows, self.cols, 3), dtype=np.intp)
+        for n, ((name, start), panel, order) in enumerate(zip(starts, panels, placed)):
+            x, y = panel.get('x', 0), panel.get('y', 0)
+            if x < 0 or y < 0 or x + order.shape[1] > self.cols or y + order.shape[0] > self.rows:
+                raise ValueError("panel %d doesn't fit on the %dx%d display" % (n, self.cols, self.rows))
+            address = start + 3 * order[:, :, np.newaxis] + np.arange(3)
+            univ, slot = np.divmod(address, self.channels)
+            self.index[y:y + order.shape[0], x:x + order.shape[1]] = rowOf[name][univ] * self.channels + slot
+            covered[y:y + order.shape[0], x:x + order.shape[1]] += 1
+        if (covered > 1).any():
+            raise ValueError("panels overlap on the display")
+        if not covered.all():
+            self.index[covered == 0] = len(self.universes) * self.channels + np.arange(3)
+            self.universes.append((None, None))	# Spare row, never sent
+        for name, (first, stop) in self.hosts.items():
+            if stop > first:
+                rows = self.index[(self.index // self.channels >= first) & (self.index // self.channels < stop)]
+                if len(np.unique(rows)) != len(rows):
+                    raise ValueError("panels share channels on " + name)
+
+# Layouts already compiled, by file
+loaded = {}
+
+# The layout in path, or in the file named by $MATRIX_LAYOUT, or in
+# layout.json next to this file, or the single matrix if there's none of those
+def loadLayout(path=None):
+    path = path or os.environ.get('MATRIX_LAYOUT') or layoutFile
+    if path not in loaded:
+        if not os.path.exists(path) and path == layoutFile:
+            loaded[path] = Layout()
+        else:
+            with open(path) as f:
+                if path.endswith(('.yaml', '.yml')):
+                    if yaml is None:
+                        raise ImportError("YAML layouts need PyYAML (sudo pip install pyyaml)")
+                    description = yaml.safe_load(f)
+                else:
+                    description = json.load(f)
+            loaded[path] = Layout(description)
+    return loaded[path]
+
+if __name__ == "__main__":
+    layout = loadLayout(sys.argv[1] if len(sys.argv) >= 2 else None)
+    print("%dx%d pixels, %d channels per universe" % (layout.cols, layout.rows, layout.channels))
+    for name, (first, stop) in layout.hosts.items():
+        univs = [univ for other, univ in layout.universes[first:stop]]
+        print("  %s: %d universes, %d to %d" % (name, len(univs), univs[0], univs[-1]))
+    if layout.universes[-1][0] is None:
+        print("  some pixels have no panel")
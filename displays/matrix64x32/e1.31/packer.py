@@ -0,0 +1,126 @@
+#!/usr/bin/env python3
+# Packs an image into the E1.31 universes of the 192x64 matrix with NumPy.
+# Each pixel's place in the universes is worked out once, in an index map
+# (pixel -> offset of its red channel in the universes laid end to end), and
+# brightness is a 256-entry lookup table, so packing a frame is one fancy
+# indexing assignment instead of a getpixel() and three floor()s per pixel.
+# The index map comes from the display's layout (see layout.py), so the same
+# one assignment packs a display of several panels and controllers.
+# Run it to benchmark packing: ./packer.py [image] [frames]
+import sys
+import time
+import math
+import numpy as np
+from PIL import Image
+from layout import loadLayout
+
+bright = 255	# Max brightness
+channels = 510	# number of channels per universe
+maxUniv = 74	# Total numbers of universes
+cols = 192
+rows = 64
+
+# Offset of each channel of each pixel in the universes laid end to end:
+# index[j, i, k] is channel k of pixel (i, j), universe offset // channels + 1
+# and slot offset % channels. Pixels run along the rows, as FPP expects.
+def indexMap(cols=cols, rows=rows):
+    pixels = np.arange(rows * cols).reshape(rows, cols)
+    return 3 * pixels[:, :, np.newaxis] + np.arange(3)
+
+# Brightness table: value v shows as floor(v * bright / 255)
+def brightnessTable(bright=bright):
+    return np.array([math.floor(v * bright / 255) for v in range(256)], dtype=np.uint8)
+
+# Image (PIL or NumPy array) as a rows x cols x 3 array of bytes
+def toArray(image):
+    if isinstance(image, Image.Image):
+        image = image.convert('RGB')
+    return np.asarray(image, dtype=np.uint8)
+
+class Packer:
+    # frame: universes x channels array to pack into, e.g. the back buffer
+    # of a MatrixFramebuffer; by default the packer has its own. Without an
+    # index map the layout's is used (by default the one from loadLayout())
+    def __init__(self, bright=bright, index=None, universes=None, frame=None, layout=None):
+        if index is None:
+            layout = loadLayout() if layout is None else layout
+            index = layout.index
+            self.numbers = [univ for host, univ in layout.universes]
+            width = layout.channels
+        else:
+            self.numbers = list(range(1, (universes or maxUniv - 1) + 1))
+            width = channels
+        self.index = index
+        self.table = brightnessTable(bright)
+        self.universes = len(self.numbers)
+        # One row of channels per universe, in the layout's order
+        self.frame = np.zeros((self.universes, width), dtype=np.uint8) if frame is None else frame
+
+    # Draw the image with its top left corner at column x, row y of a blank
+    # frame (anything past the edge is cut off) and return the frame
+    def pack(self, image, x=0, y=0):
+        pixels = toArray(image)
+        index = self.index[y:y + pixels.shape[0], x:x + pixels.shape[1]]
+        pixels = pixels[:index.shape[0], :index.shape[1], :3]
+        self.frame.fill(0)
+        self.frame.reshape(-1)[index] = self.table[pixels]
+        return self.frame
+
+    # (universe, dmx_data) for every universe of the last packed frame
+    def payloads(self):
+        return [(univ, tuple(data)) for univ, data in zip(self.numbers, self.frame.tolist()) if univ is not None]
+
+# The per-pixel loop image.py used to fill the universes, for comparison
+def packSlow(im, offset, bright=bright):
+    data = {}
+    for j in range(im.size[1]):
+        for i in range(im.size[0]):
+            univ = math.floor(3*(j*cols+i+offset) / channels) + 1
+            row = data.setdefault(univ, channels*[0])
+            rgb = im.getpixel((i, j))
+            idx = (3*(j*cols+i+offset)) % channels
+            for k in range(3):
+                row[idx+k] = math.floor(rgb[k]*bright/255)
+    return data
+
+if __name__ == "__main__":
+    if len(sys.argv) >= 2:
+        im = Image.open(sys.argv[1]).convert('RGB')
+    else:
+        # No image given: a colour gradient half the width of the panel
+        x, y = np.meshgrid(np.arange(cols // 2), np.arange(rows))
+        im = Image.fromarray(np.dstack([x * 2, y * 4, (x + y) % 256]).astype(np.uint8))
+    frames = int(sys.argv[2]) if len(sys.argv) >= 3 else 1000
+    offset = cols - im.size[0]
+    packer = Packer(200, indexMap())	# The single matrix packSlow() knows
+
+    # Check against the old loop, then time both, sliding the image across
+    # the panel as slide.py does
+    expected = packSlow(im, offset, 200)
+    packer.pack(im, offset)
+    for univ, data in packer.payloads():
+        if univ in expected and list(data) != expected[univ]:
+            print("Universe", univ, "differs from the per-pixel loop")
+            sys.exit(1)
+
+    slowFrames = max(1, frames // 200)
+    start = time.perf_counter()
+    for f in range(slowFrames):
+        packSlow(im, f % (offset + 1))
+    slow = slowFrames / (time.perf_counter() - start)
+
+    start = time.perf_counter()
+    for f in range(frames):
+        packer.pack(im, f % (offset + 1))
+    fast = frames / (time.perf_counter() - start)
+
+    start = time.perf_counter()
+    for f in range(frames):
+        packer.pack(im, f % (offset + 1))
+        packer.payloads()
+    withPayloads = frames / (time.perf_counter() - start)
+
+    print(im.size, "image,", packer.universes, "universes")
+    print("per-pixel loop:  %8.1f frames/s" % slow)
+    print("packer:          %8.1f frames/s (%.0fx)" % (fast, fast / slow))
+    print("packer+payloads: %8.1f frames/s" % withPayloads)
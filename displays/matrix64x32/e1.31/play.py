@@ -0,0 +1,171 @@
+#!/usr/bin/env python3
+# Play an animated GIF, a directory of images or a video on the matrix.
+# A separate process decodes the frames, resizes them to fit the panel and
+# packs them into a ring of universe frames in shared memory; this process
+# takes one frame from the ring per tick of the frame clock and sends it, so
+# a slow decode (or a GC pause there) never holds up the send loop. Video
+# is decoded by ffmpeg, which also scales it and sets the frame rate.
+# Usage: ./play.py clip.gif [--fps 30] [--loop] [--bright 128]
+import os
+import sys
+import glob
+import argparse
+import subprocess
+import multiprocessing
+from multiprocessing import shared_memory
+import numpy as np
+from PIL import Image, ImageOps, ImageSequence
+from packer import Packer
+from framebuffer import MatrixFramebuffer
+from frameclock import FrameClock
+from layout import loadLayout
+
+bright = 255	# Max brightness
+fps = 30
+ringSize = 16	# Frames decoded ahead
+
+imageTypes = ('.png', '.jpg', '.jpeg', '.gif', '.bmp', '.webp')
+
+# Fit an image inside the display, size (cols, rows), keeping its shape;
+# returns it with the column and row to draw it at to center it
+def fit(im, size):
+    im = ImageOps.contain(im.convert('RGB'), size)
+    return im, (size[0] - im.size[0]) // 2, (size[1] - im.size[1]) // 2
+
+# GIF frames, each repeated for as many output frames as its duration covers
+def gifFrames(path, fps, size):
+    im = Image.open(path)
+    shown = 0	# Output frames so far
+    until = 0.0	# Seconds from the start to the end of this GIF frame
+    for frame in ImageSequence.Iterator(im):
+        until += frame.info.get('duration', 100) / 1000
+        fitted = fit(frame, size)
+        while shown < round(until * fps):
+            yield fitted
+            shown += 1
+
+# One frame per image, in name order
+def sequenceFrames(paths, size):
+    for path in paths:
+        yield fit(Image.open(path), size)
+
+# Frames of a video, scaled and padded to the display by ffmpeg at fps
+def videoFrames(path, fps, size):
+    cols, rows = size
+    command = ['ffmpeg', '-loglevel', 'error', '-i', path, '-r', str(fps),
+               '-vf', 'scale=%d:%d:force_original_aspect_ratio=decrease,pad=%d:%d:(ow-iw)/2:(oh-ih)/2'
+               % (cols, rows, cols, rows),
+               '-f', 'rawvideo', '-pix_fmt', 'rgb24', '-']
+    frameBytes = cols * rows * 3
+    try:
+        ffmpeg = subprocess.Popen(command, stdout=subprocess.PIPE)
+    except FileNotFoundError:
+        print("Playing video needs ffmpeg (sudo apt-get install ffmpeg)")
+        return
+    with ffmpeg:
+        try:
+            while True:
+                data = ffmpeg.stdout.read(frameBytes)
+                if len(data) < frameBytes:
+                    break
+                yield np.frombuffer(data, dtype=np.uint8).reshape(rows, cols, 3), 0, 0
+        finally:
+            ffmpeg.kill()
+
+def frames(source, fps, size):
+    if os.path.isdir(source):
+        paths = sorted(p for p in glob.glob(os.path.join(source, '*')) if p.lower().endswith(imageTypes))
+        return sequenceFrames(paths, size)
+    if any(c in source for c in '*?['):
+        return sequenceFrames(sorted(glob.glob(source)), size)
+    if source.lower().endswith(imageTypes):
+        return gifFrames(source, fps, size)
+    return videoFrames(source, fps, size)
+
+# Decode process: fill the ring's free slots with packed frames, in order
+def decode(ring, free, filled, finished, source, fps, loop, bright, layout):
+    slots = np.ndarray((ringSize, len(layout.universes), layout.channels), dtype=np.uint8, buffer=ring.buf)
+    packer = Packer(bright, layout=layout)
+    count = 0
+    try:
+        while True:
+            for image, x, y in frames(source, fps, (layout.cols, layout.rows)):
+                free.acquire()
+                packer.frame = slots[count % ringSize]
+                packer.pack(image, x, y)
+                count += 1
+                filled.release()
+            if not loop or count == 0:
+                break
+    except KeyboardInterrupt:
+        pass
+    finally:
+        finished.set()
+
+def main():
+    parser = argparse.ArgumentParser(description='Play an animated GIF, images or a video on the matrix')
+    parser.add_argument('source', help='GIF, directory or glob of images, or a video file (needs ffmpeg)')
+    parser.add_argument('--fps', type=float, default=fps, help='frames per second (default %d)' % fps)
+    parser.add_argument('--bright', type=int, default=bright, help='max brightness (default %d)' % bright)
+    parser.add_argument('--loop', action='store_true', help='play the source over and over')
+    parser.add_argument('--layout', help='layout file (default: layout.json or $MATRIX_LAYOUT)')
+    parser.add_argument('--host', help="send every panel's universes here instead of to the layout's hosts")
+    parser.add_argument('--sync', type=int, metavar='UNIVERSE', help='send sync packets on UNIVERSE')
+    args = parser.parse_args()
+    if not glob.glob(args.source):
+        parser.error("no such file: " + args.source)
+    layout = loadLayout(args.layout)
+
+    frameBytes = len(layout.universes) * layout.channels
+    ring = shared_memory.SharedMemory(create=True, size=ringSize * frameBytes)
+    slots = np.ndarray((ringSize, len(layout.universes), layout.channels), dtype=np.uint8, buffer=ring.buf)
+    free = multiprocessing.Semaphore(ringSize)
+    filled = multiprocessing.Semaphore(0)
+    finished = multiprocessing.Event()
+    decoder = multiprocessing.Process(target=decode, daemon=True, args=(
+        ring, free, filled, finished, args.source, args.fps, args.loop, args.bright, layout))
+    decoder.start()
+
+    fb = MatrixFramebuffer(destination=args.host, sync=args.sync, layout=layout)
+    clock = FrameClock(args.fps)
+    taken = 0	# Frames taken from the ring
+    underruns = 0	# Ticks with no frame decoded in time
+    try:
+        # Wait for the first frame so start-up isn't counted as underruns.
+        # finished is read before the ring: it's set after the last frame
+        # goes in, so an empty ring after it's set means there are no more.
+        while True:
+            ended = finished.is_set()
+            if filled.acquire(timeout=0.1):
+                filled.release()
+                break
+            if ended:
+                print("No frames in", args.source)
+                sys.exit(1)
+        for frame in clock.frames():
+            # Take the frame this tick is for, skipping any the clock dropped
+            ended = finished.is_set()
+            while taken <= frame and filled.acquire(block=False):
+                if taken == frame:
+                    fb.back[:] = slots[taken % ringSize]
+                taken += 1
+                free.release()
+            if taken <= frame:	# Ring ran dry before this tick's frame
+                if ended:
+                    break	# Played to the end
+                underruns += 1	# Show the last frame again; skip ahead later
+            fb.show()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        decoder.terminate()
+        decoder.join()
+        fb.close()
+        ring.close()
+        ring.unlink()
+    print(taken, "frames,", underruns, "underruns")
+    print(fb.stats())
+    print(clock.report())
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,196 @@
+#!/usr/bin/env python3
+# Stand-in for the FPP host: receives E1.31 on UDP 5568, puts the universes
+# back together into the 192x64 image and measures what arrives, so changes
+# on the sending side can be benchmarked without the matrix.
+# A frame ends with a sync packet when the sender uses them, otherwise when
+# a universe already seen in the frame arrives again (the next frame has
+# begun) or nothing arrives for a few ms (--gap). Every interval it reports:
+#   fps      frames received per second
+#   loss     packets missing from each universe's sequence numbers, and
+#            gaps (places where one or more went missing)
+#   tearing  how long each frame took to arrive, first packet to last, and
+#            the share of the time a display refreshing on its own would
+#            have shown a frame partly updated (0 with sync packets, which
+#            tell the receiver to hold the data until the frame is whole)
+# Without sync packets the fps and tearing figures depend on the gap: it
+# must be longer than the pauses within a burst of packets and shorter than
+# the time between frames, or frames that only send the universes that
+# changed (framebuffer.py) are counted as one.
+# Point the scripts at it by running them with "fpp" resolving to this
+# machine (e.g. "127.0.0.1 fpp" in /etc/hosts), or E131Sender("127.0.0.1").
+# The image is put back together with the display's layout (see layout.py);
+# with several controllers it stands in for one of them, --host.
+import os
+import time
+import socket
+import argparse
+from collections import Counter
+import numpy as np
+from layout import loadLayout
+
+port = 5568	# E1.31 UDP port
+gap = 0.005	# Seconds of silence that end a frame
+
+class Receiver:
+    # host: which of the layout's hosts this stands in for (default the first)
+    def __init__(self, layout=None, host=None, bind='', port=port, gap=gap):
+        if gap <= 0:
+            raise ValueError("gap must be more than 0")	# 0 would make recv non-blocking
+        self.layout = loadLayout() if layout is None else layout
+        host = next(iter(self.layout.hosts)) if host is None else host
+        if host not in self.layout.hosts:
+            raise ValueError("no panels on host " + host)
+        first, stop = self.layout.hosts[host]
+        self.rowOf = {univ: row for row, (other, univ) in enumerate(self.layout.universes)
+                      if first <= row < stop}	# Universe -> row of frame
+        self.sock = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+        self.sock.setsockopt(socket.SOL_SOCKET, socket.SO_RCVBUF, 4 * 1024 * 1024)
+        self.sock.bind((bind, port))
+        self.gap = gap
+        self.sock.settimeout(gap)
+        self.buffer = bytearray(1144)	# Largest E1.31 packet
+        self.channels = self.layout.channels
+        self.frame = np.zeros((len(self.layout.universes), self.channels), dtype=np.uint8)
+        self.seq = {}			# (source CID, universe) -> last sequence number
+        self.packets = Counter()	# Universe -> packets received
+        self.lost = Counter()		# Universe -> packets missing
+        self.gaps = Counter()		# Universe -> places packets went missing
+        self.outOfOrder = Counter()	# Universe -> late or repeated packets
+        self.totalLost = Counter()	# Universe -> packets missing over the whole run
+        self.synced = False		# Sender uses sync packets
+        self.inFrame = set()		# Universes received in the current frame
+        self.frameStart = self.lastPacket = None
+        self.frames = 0
+        self.spans = []			# Seconds from first to last packet of each frame
+        self.onFrame = None		# Called with each finished frame number
+
+    # The frame as a rows x cols x 3 image
+    def image(self):
+        return self.frame.reshape(-1)[self.layout.index]
+
+    # Receive for the given number of seconds (forever if None), calling
+    # report() every interval seconds
+    def run(self, seconds=None, interval=1.0, report=None):
+        start = nextReport = time.monotonic()
+        while seconds is None or time.monotonic() - start < seconds:
+            try:
+                length = self.sock.recv_into(self.buffer)
+                self.handle(memoryview(self.buffer)[:length], time.monotonic())
+            except socket.timeout:
+                self.endFrame()
+            now = time.monotonic()
+            if report is not None and now >= nextReport + interval:
+                report(self, now - nextReport)
+                nextReport = now
+        self.endFrame()
+
+    def handle(self, packet, now):
+        if len(packet) < 49 or packet[4:16] != b'ASC-E1.17\0\0\0':
+            return
+        rootVector = int.from_bytes(packet[18:22], 'big')
+        if rootVector == 8 and int.from_bytes(packet[40:44], 'big') == 1:
+            self.synced = True
+            self.endFrame()	# Sync: show what has arrived
+            return
+        if rootVector != 4 or len(packet) < 126 or packet[125] != 0:
+            return	# Not DMX data
+        univ = int.from_bytes(packet[113:115], 'big')
+        seq = packet[111]
+        if not self.synced and self.inFrame and (univ in self.inFrame or now - self.lastPacket > self.gap):
+            self.endFrame()	# This universe starts the next frame
+        self.packets[univ] += 1
+        source = (bytes(packet[22:38]), univ)	# Each sender numbers its packets
+        last = self.seq.get(source)
+        if last is not None:
+            step = (seq - last) % 256
+            if step == 0 or step > 236:
+                # E1.31 receivers discard packets up to 20 behind the last
+                self.outOfOrder[univ] += 1
+                return
+            if step > 1:
+                self.lost[univ] += step - 1
+                self.totalLost[univ] += step - 1
+                self.gaps[univ] += 1
+        self.seq[source] = seq
+        row = self.rowOf.get(univ)
+        if row is not None:
+            data = packet[126:126 + self.channels]
+            self.frame[row, :len(data)] = np.frombuffer(data, dtype=np.uint8)
+        if not self.inFrame:
+            self.frameStart = now
+        self.inFrame.add(univ)
+        self.lastPacket = now
+
+    def endFrame(self):
+        if not self.inFrame:
+            return
+        self.spans.append(self.lastPacket - self.frameStart)
+        self.inFrame.clear()
+        self.frames += 1
+        if self.onFrame is not None:
+            self.onFrame(self.frames)
+
+# argparse type for --gap: 0 would make the socket non-blocking
+def positive(text):
+    value = float(text)
+    if value <= 0:
+        raise argparse.ArgumentTypeError("must be more than 0")
+    return value
+
+# One line of figures for the last interval, then start counting again
+def printReport(receiver, elapsed):
+    packets = sum(receiver.packets.values())
+    lost = sum(receiver.lost.values())
+    spans = receiver.spans
+    meanSpan = 1000 * sum(spans) / len(spans) if spans else 0
+    maxSpan = 1000 * max(spans) if spans else 0
+    torn = 0 if receiver.synced else 100 * min(1, sum(spans) / elapsed)
+    print("%6.1f fps %7.0f packets/s, lost %d (%.2f%%) in %d gaps, %d out of order, "
+          "frames arrive over %.2f ms mean %.2f ms max, torn %.1f%% of the time%s" % (
+              len(spans) / elapsed, packets / elapsed, lost, 100 * lost / (packets + lost) if packets + lost else 0,
+              sum(receiver.gaps.values()), sum(receiver.outOfOrder.values()), meanSpan, maxSpan, torn,
+              " (synced)" if receiver.synced else ""), flush=True)
+    for counter in (receiver.packets, receiver.lost, receiver.gaps, receiver.outOfOrder):
+        counter.clear()
+    spans.clear()
+
+def main():
+    parser = argparse.ArgumentParser(description='Receive E1.31 for the matrix and measure it')
+    parser.add_argument('--layout', help='layout file (default: layout.json or $MATRIX_LAYOUT)')
+    parser.add_argument('--host', help="receive the universes of this host's panels (default the first host)")
+    parser.add_argument('--bind', default='', help='address to listen on (default all)')
+    parser.add_argument('--port', type=int, default=port, help='UDP port (default %d)' % port)
+    parser.add_argument('--seconds', type=float, help='stop after SECONDS (default: run until Ctrl-C)')
+    parser.add_argument('--gap', type=positive, default=1000 * gap,
+                        help='milliseconds of silence that end a frame without sync packets (default %g)' % (1000 * gap))
+    parser.add_argument('--interval', type=float, default=1.0, help='seconds between reports (default 1)')
+    parser.add_argument('--dump', metavar='DIR', help='save received frames in DIR')
+    parser.add_argument('--format', choices=['png', 'npy'], default='png', help='format of saved frames')
+    parser.add_argument('--every', type=int, default=1, metavar='N', help='save every Nth frame (default 1)')
+    args = parser.parse_args()
+
+    receiver = Receiver(loadLayout(args.layout), args.host, args.bind, args.port, args.gap / 1000)
+    if args.dump:
+        os.makedirs(args.dump, exist_ok=True)
+        def dump(frame):
+            if frame % args.every:
+                return
+            path = os.path.join(args.dump, "frame%06d.%s" % (frame, args.format))
+            if args.format == 'npy':
+                np.save(path, receiver.image())
+            else:
+                from PIL import Image
+                Image.fromarray(receiver.image()).save(path)
+        receiver.onFrame = dump
+    print("Listening on UDP port", args.port)
+    try:
+        receiver.run(args.seconds, args.interval, printReport)
+    except KeyboardInterrupt:
+        pass
+    if receiver.totalLost:
+        print("Packets lost by universe:",
+              ", ".join("%d: %d" % (univ, n) for univ, n in sorted(receiver.totalLost.items())))
+    print(receiver.frames, "frames received")
+
+if __name__ == "__main__":
+    main()
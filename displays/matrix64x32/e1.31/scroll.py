@@ -0,0 +1,43 @@
+#!/usr/bin/env python3
+# Scroll a line of text across the matrix, right to left.
+# Only the universes the text passes through change from frame to frame, so
+# the framebuffer sends a fraction of the packets; it reports how many.
+# Usage: ./scroll.py [text] [bright]
+import sys
+from PIL import Image, ImageDraw
+from packer import Packer
+from framebuffer import MatrixFramebuffer
+from layout import loadLayout
+from frameclock import FrameClock
+
+bright = 255	# Max brightness
+layout = loadLayout()	# layout.json, or the single 192x64 matrix
+cols = layout.cols
+rows = layout.rows
+top = 28	# Row of the top of the text
+fps = 50	# Frames per second, one column per frame
+
+text = "Hello from the BeagleBone"
+if len(sys.argv) >= 2:
+    text = sys.argv[1]
+
+if len(sys.argv) >= 3:
+    bright = int(sys.argv[2])
+
+# Draw the text once, then slide the image across the panel
+width = ImageDraw.Draw(Image.new('RGB', (1, 1))).textlength(text)
+im = Image.new('RGB', (int(width) + 1, 10))
+ImageDraw.Draw(im).text((0, 0), text, fill=(255, 160, 0))
+
+fb = MatrixFramebuffer()	# Sends to the layout's hosts
+packer = Packer(bright, frame=fb.back)
+padded = Image.new('RGB', (cols + im.size[0], im.size[1]))
+padded.paste(im, (cols, 0))	# Start just off the right edge
+clock = FrameClock(fps)
+for x in clock.frames(padded.size[0] - cols + 1):
+    packer.pack(padded.crop((x, 0, x + cols, im.size[1])), 0, top)
+    fb.show()
+
+print(fb.stats())
+print(clock.report())
+fb.close()
@@ -1,16 +1,20 @@
 #!/usr/bin/env python3
-# From https://github.com/Hundemeier/sacn
-import sacn
-import time
+# Slide an image across the matrix until it is right justified, at a
+# steady frame rate.
+# Usage: ./slide.py [file] [bright] [fps]
 import sys
 import math
 from PIL import Image
+from packer import Packer
+from framebuffer import MatrixFramebuffer
+from layout import loadLayout
+from frameclock import FrameClock
 
 bright = 255    # Max brightness
-channels = 510  # number of channels per universe
-maxUniv = 74    # Total numbers of universes
-cols = 192
-rows = 64
+fps = 120       # Frames per second, one column per frame
+layout = loadLayout()	# layout.json, or the single 192x64 matrix
+cols = layout.cols
+rows = layout.rows
 
 file = "sarahSmall.jpg"
 if len(sys.argv) >= 2:
@@ -19,6 +23,9 @@ if len(sys.argv) >= 2:
 if len(sys.argv) >= 3:
     bright = int(sys.argv[2])
 
+if len(sys.argv) >= 4:
+    fps = float(sys.argv[3])
+
 im = Image.open(file)
 print(file, im.bits, im.size, im.format, im.mode)
 if im.size > (cols, rows):
@@ -29,40 +36,17 @@ if im.size > (cols, rows):
 offset = math.floor((cols-im.size[0]))
 print("offset: ", offset)
 
-sender = sacn.sACNsender()  # provide an IP-Address to bind to if you are using Windows and want to use multicast
-sender.start()  # start the sending thread
-# sender[univ].multicast = False  # set multicast to True
-# Keep in mind that if multicast is on, unicast is not used
-
-for univ in range(1, maxUniv):
-    sender.activate_output(univ)  # start sending out data in the 1st universe
-    sender[univ].destination = "fpp"  # or provide unicast information.
-
-# Cycle through each pixel one row at a time
-# Fill in each universe and then send it
-
-for l in range(0, offset+1):
-    lastUniv = 1    # If different than last univ, send
-    row = channels*[0]      # Start with a blank row
-    # print("l: ", l)
-    for j in range(im.size[1]):
-        for i in range(im.size[0]):
-            univ = math.floor(3*(j*cols+i+l) / channels) + 1    # Univ starts with 1
-            # print("univ: ", univ)
-            if(univ != lastUniv):       # You've switched universes
-                # print("New univ: ", univ, i, j)
-                # print("lastUniv: ", lastUniv)
-                sender[lastUniv].dmx_data = row
-                row = channels*[0]
-                lastUniv = univ
-            rgb = im.getpixel((i, j))
-            idx = (3*(j*cols+i+l)) % channels
-            # print("i, j ", i, j, "idx: ", idx, "univ: ", univ)
-            for k in range(3):
-                row[idx+k] = math.floor(rgb[k]*bright/255)
-
-    sender[univ].dmx_data = row
+fb = MatrixFramebuffer()        # Sends to the layout's hosts
 
-    time.sleep(0.008)
+# Slide the image in from the left, packing it into the back buffer at each
+# offset; only the universes that changed are sent. The clock keeps the
+# pace at fps, skipping offsets if a frame runs late.
+packer = Packer(bright, frame=fb.back)
+clock = FrameClock(fps)
+for l in clock.frames(offset+1):
+    packer.pack(im, l)
+    fb.show()
 
-sender.stop()  # do not forget to stop the sender
+print(fb.stats())
+print(clock.report())
+fb.close()
@@ -1,8 +1,9 @@
 #!/usr/bin/env python3
-# From https://github.com/Hundemeier/sacn
-import sacn
-import time
+# Flash the whole matrix between a color and its reverse.
+# Usage: ./test.py [red green blue]
 import sys
+from framebuffer import MatrixFramebuffer
+from frameclock import FrameClock
 
 color = [0, 0, 0]	# Black by default
 if len(sys.argv) == 4:
@@ -11,36 +12,15 @@ if len(sys.argv) == 4:
     color[2] = int(sys.argv[3])
     print("Color: ", color[0], " ", color[1], " ", color[2])
 
-channels = 510	# number of channels per universe
-maxUniv = 74	# Total numbers of universes
-sender = sacn.sACNsender()  # provide an IP-Address to bind to if you are using Windows and want to use multicast
-sender.start()  # start the sending thread
-# sender[univ].multicast = False  # set multicast to True
-# Keep in mind that if multicast is on, unicast is not used
+fb = MatrixFramebuffer()	# Sends to the layout's hosts
+pixels = fb.back.reshape(len(fb.back), -1, 3)	# 170 RGB pixels per universe
 
-for univ in range(1, maxUniv):
-	sender.activate_output(univ)  # start sending out data in the 1st universe
-	sender[univ].destination = "fpp"  # or provide unicast information.
+# Alternate the color and its reverse, 20 frames a second, 18 frames
+clock = FrameClock(20)
+for frame in clock.frames(18):
+	pixels[:] = color if frame % 2 == 0 else color[::-1]
+	fb.show()
 
-for count in range(1, 10):
-	for univ in range(1, maxUniv):
-		# sender[univ].dmx_data = (0, 255, 0, 255, 0, 0, 255, 255, 255)  # some test DMX data
-		row = []
-		for i in range(0, 510, 3):
-			row.append(color[0])
-			row.append(color[1])
-			row.append(color[2])
-		sender[univ].dmx_data = row
-	time.sleep(0.05)  # send the data for 10 seconds
-
-	for univ in range(1, maxUniv):
-		# sender[univ].dmx_data = (0, 255, 0, 255, 0, 0, 255, 255, 255)  # some test DMX data
-		row = []
-		for i in range(0, 510, 3):
-			row.append(color[2])
-			row.append(color[1])
-			row.append(color[0])
-		sender[univ].dmx_data = row
-	time.sleep(0.05)  # send the data for 10 seconds
-
-sender.stop()  # do not forget to stop the sender
+print(fb.stats())
+print(clock.report())
+fb.close()